@@ -0,0 +1,256 @@
+"""
+Benchmark how fast the games train.
+
+Runs a few generations of every game headless, with a fixed seed, for
+population sizes from the configured pop_size up to 10k and writes the rates
+and the per-phase time of every generation to JSON, so runs on different
+commits can be compared:
+
+    python benchmark.py --generations 3 --output benchmark.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import neat  # noqa: E402
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+from neat.reporting import BaseReporter  # noqa: E402
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from common import collision, timing  # noqa: E402
+from common.budget import read_budget  # noqa: E402
+from common.seeding import CourseSeeder  # noqa: E402
+
+# game: (folder, module, config file)
+GAMES = {
+    "flappy": ("flappy_bird", "flappy", "config-flappybird.txt"),
+    "microcars": ("microcars", "microcar", "config-microcar.txt"),
+    "hurdler": ("hurdler", "hurdler", "config-hurdler.txt"),
+}
+SIZES = (100, 1000, 10000)
+
+
+def load_game(name):
+    """
+    Import a game module.
+
+    name: key of GAMES (str)
+
+    return: game module and path of its config file (tuple)
+    """
+
+    folder, module, config_file = GAMES[name]
+    sys.path.insert(0, os.path.join(ROOT, folder))
+    return importlib.import_module(module), os.path.join(ROOT, folder, config_file)
+
+
+class Benchmark(BaseReporter):
+    """
+    Fitness function and reporter timing every generation of one run.
+
+    game: game module with a play(genomes, config, render) function
+    render: draw every frame, to the dummy video driver by default (bool)
+    """
+
+    def __init__(self, game, render=False):
+        self.game = game
+        self.render = render
+        self.generations = []
+        self._start = 0.0
+
+    def start_generation(self, generation):
+        self._start = perf_counter()
+
+    def evaluate(self, genomes, config):
+        timer = timing.PhaseTimer()
+        previous = timing.TIMER
+        timing.TIMER = timer
+        start = perf_counter()
+        try:
+            self.game.play(genomes, config, self.render)
+        finally:
+            timing.TIMER = previous
+        seconds = perf_counter() - start
+
+        phases = dict(timer.seconds)
+        phases["other"] = seconds - sum(timer.seconds.values())
+        self.generations.append(
+            {
+                "evaluation_seconds": seconds,
+                "phases": phases,
+                "steps": timer.steps,
+                "agent_steps": timer.agent_steps,
+                "activations": timer.activations,
+            }
+        )
+
+    def end_generation(self, config, population, species_set):
+        self.generations[-1]["seconds"] = perf_counter() - self._start
+
+    def summary(self):
+        """Rates over all generations (dict)."""
+
+        seconds = sum(g["evaluation_seconds"] for g in self.generations)
+        return {
+            "steps_per_second": sum(g["steps"] for g in self.generations) / seconds,
+            "agent_steps_per_second": sum(g["agent_steps"] for g in self.generations)
+            / seconds,
+            "activations_per_second": sum(g["activations"] for g in self.generations)
+            / seconds,
+            "seconds_per_generation": float(
+                np.mean([g["seconds"] for g in self.generations])
+            ),
+        }
+
+
+def bench(name, pop_size, generations, seed, max_steps, render=False):
+    """
+    Time a few generations of one game.
+
+    name: key of GAMES (str)
+    pop_size: population size, None for the configured one (int)
+    generations: (int)
+    seed: seed of evolution and obstacle courses (int)
+    max_steps: frame limit per generation, 0 for none (int)
+    render: draw every frame (bool)
+
+    return: results of the run (dict)
+    """
+
+    game, config_path = load_game(name)
+    config = neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        config_path,
+    )
+    read_budget(config, config_path)
+    if pop_size is not None:
+        config.pop_size = pop_size
+    config.max_steps = max_steps
+    config.stop_at_threshold = False
+    config.no_fitness_termination = True
+
+    random.seed(seed)
+    p = neat.Population(config)
+    p.add_reporter(CourseSeeder(config, seed))
+    benchmark = Benchmark(game, render)
+    p.add_reporter(benchmark)
+    p.run(benchmark.evaluate, generations)
+
+    result = {"game": name, "pop_size": config.pop_size, "seed": seed}
+    result.update(benchmark.summary())
+    result["generations"] = benchmark.generations
+    return result
+
+
+def commit():
+    """Git commit of the code being measured, None outside a checkout (str)."""
+
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    collision.ANALYTIC = args.box_hitboxes
+
+    results = []
+    for name in args.games:
+        _, config_path = load_game(name)
+        configured = neat.config.Config(
+            neat.DefaultGenome,
+            neat.DefaultReproduction,
+            neat.DefaultSpeciesSet,
+            neat.DefaultStagnation,
+            config_path,
+        ).pop_size
+        sizes = args.sizes or [configured] + [n for n in SIZES if n > configured]
+
+        for size in sizes:
+            result = bench(
+                name, size, args.generations, args.seed, args.max_steps, args.render
+            )
+            results.append(result)
+            print(
+                "{0} pop {1}: {2:.0f} steps/s, {3:.0f} agent-steps/s, "
+                "{4:.3f} s/generation".format(
+                    name,
+                    size,
+                    result["steps_per_second"],
+                    result["agent_steps_per_second"],
+                    result["seconds_per_generation"],
+                )
+            )
+
+    report = {
+        "commit": commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "box_hitboxes": args.box_hitboxes,
+        "max_steps": args.max_steps,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--games",
+        nargs="+",
+        choices=sorted(GAMES),
+        default=sorted(GAMES),
+        help="games to run (all by default)",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        help="population sizes (default: configured pop_size, then up to 10k)",
+    )
+    parser.add_argument(
+        "--generations", type=int, default=3, help="generations per run"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of every run")
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=2000,
+        help="frame limit per generation, 0 for none",
+    )
+    parser.add_argument(
+        "--box-hitboxes",
+        action="store_true",
+        help="collide on opaque bounding boxes instead of pixel masks",
+    )
+    parser.add_argument(
+        "--render",
+        action="store_true",
+        help="also draw every frame (the frame-rate cap shows up as other)",
+    )
+    parser.add_argument("--output", default="benchmark.json", help="JSON file to write")
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+"""
+Living agents of one generation, with their genomes and fitness.
+
+Every genome owns a fixed row: its network in a FeedForwardBatch, its
+fitness and its state in the arrays of the game. The container tracks
+which rows are still alive. Removing an agent swaps it with the last
+living one, so it is O(1) and never shifts the others.
+"""
+
+import numpy as np
+
+from common.budget import TruncatedFitness
+
+
+class Agents:
+    """
+    Agents still in the game, in no particular order.
+
+    genomes: genome of every row (list)
+    fitness: fitness of every row (numpy float array)
+    """
+
+    def __init__(self, genomes):
+        """
+        genomes: (genome_id, genome) pairs (list)
+        """
+
+        self.genomes = [g for _, g in genomes]
+        self.fitness = np.zeros(len(self.genomes))
+        self._rows = np.arange(len(self.genomes))
+        self._count = len(self.genomes)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def rows(self):
+        """Rows of the living agents (numpy int array)."""
+
+        return self._rows[: self._count]
+
+    def remove(self, position):
+        """
+        Remove one agent, moving the last living agent into its place.
+
+        position: index into rows (int)
+        """
+
+        last = self._count - 1
+        rows = self._rows
+        rows[position], rows[last] = rows[last], rows[position]
+        self._count = last
+
+    def remove_where(self, dead):
+        """
+        Remove every agent flagged in a mask over the living agents.
+
+        dead: one flag per living agent, same order as rows (numpy bool array)
+        """
+
+        if not dead.any():
+            return
+
+        for position in np.flatnonzero(dead)[::-1]:
+            self.remove(position)
+
+    def assign_fitness(self, truncated=None):
+        """
+        Copy the accumulated fitness onto the genomes.
+
+        truncated: why the game stopped early, marks the fitness of the
+            agents still alive as a TruncatedFitness (str)
+        """
+
+        for g, f in zip(self.genomes, self.fitness.tolist()):
+            g.fitness = f
+        if truncated is not None:
+            for row in self.rows:
+                g = self.genomes[row]
+                g.fitness = TruncatedFitness(g.fitness, truncated)
@@ -0,0 +1,132 @@
+"""
+Sprites and fonts of a game, loaded on first use.
+
+Importing a game must not load images or scan the system fonts: worker
+processes only simulate and should not pay for either. An Assets registry
+knows how to build every sprite but only does it when something asks for
+it, which normally is the renderer.
+
+The simulation needs sprite sizes and collision shapes. Sizes come from a
+metadata table written into the game module, so they are known without any
+image; each image is checked against the table when it is loaded. With box
+hitboxes the collision shapes are built from the table too, pixel-perfect
+collision loads just the sprites it tests.
+"""
+
+import os
+
+import pygame
+
+from common import collision
+
+
+class Assets:
+    """
+    Registry of the sprites and fonts of one game.
+
+    folder: directory of the image files (str)
+    sprites: name -> (width, height, opaque box (x, y, w, h)) per sprite (dict)
+    """
+
+    def __init__(self, folder, sprites):
+        self.folder = folder
+        self.sprites = sprites
+        self._sources = {}
+        self._images = {}
+        self._shapes = {}
+        self._fonts = {}
+
+    def add(self, name, source, scale2x=False):
+        """
+        Register a sprite.
+
+        name: key in the sprites table (str)
+        source: image file in folder (str) or function building the image,
+            e.g. from other sprites (callable)
+        scale2x: double the size of the loaded image (bool)
+        """
+
+        self._sources[name] = (source, scale2x)
+
+    def __getitem__(self, name):
+        """Image of a sprite, loaded on first use (pygame Surface)."""
+
+        try:
+            return self._images[name]
+        except KeyError:
+            pass
+
+        image = self._load(name)
+        if image.get_size() != self.size(name):
+            raise ValueError(
+                "Sprite {0} is {1}x{2}, not {3}x{4} as in the sprite table".format(
+                    name, *image.get_size(), *self.size(name)
+                )
+            )
+        self._images[name] = image
+        return image
+
+    def size(self, name):
+        """Width and height of a sprite, without loading it (tuple)."""
+
+        width, height, _ = self.sprites[name]
+        return width, height
+
+    def shape(self, name):
+        """
+        Collision shape of a sprite.
+
+        With collision.ANALYTIC the shape comes from the table alone,
+        otherwise the image is loaded for its pixel mask.
+
+        return: (collision.Shape)
+        """
+
+        if not collision.ANALYTIC:
+            return collision.shape(self[name])
+
+        try:
+            return self._shapes[name]
+        except KeyError:
+            width, height, box = self.sprites[name]
+            self._shapes[name] = collision.Shape(width, height, box)
+            return self._shapes[name]
+
+    def font(self, name, size):
+        """
+        System font, looked up on first use.
+
+        name: font family (str)
+        size: (int)
+
+        return: (pygame Font)
+        """
+
+        key = (name, size)
+        if key not in self._fonts:
+            pygame.font.init()
+            self._fonts[key] = pygame.font.SysFont(name, size)
+        return self._fonts[key]
+
+    def table(self):
+        """
+        Measure every registered sprite, to write the sprites table.
+
+        return: name -> (width, height, opaque box) (dict)
+        """
+
+        sprites = {}
+        for name in self._sources:
+            shape = collision.Shape.from_surface(self._load(name))
+            sprites[name] = (shape.width, shape.height, shape.box)
+        return sprites
+
+    def _load(self, name):
+        source, scale2x = self._sources[name]
+        if callable(source):
+            image = source()
+        else:
+            image = pygame.image.load(os.path.join(self.folder, source))
+        if scale2x:
+            image = pygame.transform.scale2x(image)
+        return image
@@ -0,0 +1,84 @@
+"""
+Rotated sprite images, built once instead of every frame.
+
+Birds and cars only ever turn to a handful of angles, so rotating their
+image for every agent and frame allocates the same surfaces over and over.
+A RotationAtlas keeps each rotated frame together with the offset that keeps
+it centred on the unrotated image. Collision tests use the unrotated shapes,
+so the atlas is only drawn from. It loads the images and rotates them to all
+known angles when first used. Frames are converted to the display's pixel
+format the first time they are drawn, which makes blitting them several
+times faster.
+"""
+
+import pygame
+
+
+class RotationAtlas:
+    """
+    Rotated copies of the frames of a sprite.
+
+    load_images: returns the animation frames, called on first use (function)
+    angles: rotations in degrees to build together with the images, others
+        are added when asked for (iterable of int)
+    """
+
+    def __init__(self, load_images, angles=()):
+        self.load_images = load_images
+        self.angles = list(angles)
+        self.images = None
+        self._entries = {}
+        self._converted = {}
+
+    def get(self, frame, angle):
+        """
+        Look a rotated frame up.
+
+        frame: index into images (int)
+        angle: degrees, as passed to pygame.transform.rotate (int)
+
+        return: rotated image (pygame Surface) and offset of its topleft from
+            the unrotated topleft (tuple)
+        """
+
+        key = (frame, angle)
+        try:
+            return self._entries[key]
+        except KeyError:
+            pass
+
+        if self.images is None:
+            self.images = self.load_images()
+            for i in range(len(self.images)):
+                for known in self.angles:
+                    self._entries[i, known] = self._rotate(i, known)
+        if key not in self._entries:
+            self._entries[key] = self._rotate(frame, angle)
+        return self._entries[key]
+
+    def _rotate(self, frame, angle):
+        image = self.images[frame]
+        rotated = pygame.transform.rotate(image, angle)
+        rect = rotated.get_rect(center=image.get_rect().center)
+        return rotated, rect.topleft
+
+    def blit(self, win, frame, angle, pos):
+        """
+        Draw a rotated frame centred where the unrotated one would be.
+
+        win: (pygame Surface)
+        frame: index into images (int)
+        angle: degrees (int)
+        pos: topleft of the unrotated image (tuple)
+        """
+
+        key = (frame, angle)
+        try:
+            rotated, (dx, dy) = self._converted[key]
+        except KeyError:
+            rotated, (dx, dy) = self.get(frame, angle)
+            if pygame.display.get_surface() is not None:
+                rotated = rotated.convert_alpha()
+                self._converted[key] = rotated, (dx, dy)
+
+        win.blit(rotated, (pos[0] + dx, pos[1] + dy))
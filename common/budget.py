@@ -0,0 +1,138 @@
+"""
+Limits on how long a game keeps simulating.
+
+A good genome can survive forever, so every evaluation runs under a budget
+read from the [Simulation] section of the game's config file:
+
+    max_steps           frames per evaluation, 0 for no limit
+    generation_seconds  wall-clock time per generation, 0 for no limit
+    stop_at_threshold   stop once the fitness threshold is certainly met,
+                        with fitness_criterion = max only
+
+The settings are stored on the NEAT config, like course_seed, so they reach
+evaluations in other processes. Agents still alive when a budget runs out
+get a TruncatedFitness, which BudgetReporter counts in the stats output.
+"""
+
+import configparser
+import time
+
+from neat.reporting import BaseReporter
+
+
+def read_budget(config, config_path):
+    """
+    Copy the [Simulation] settings of a config file onto a NEAT config.
+
+    config: NEAT configuration (neat.Config)
+    config_path: file the configuration was read from (str)
+    """
+
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    config.max_steps = parser.getint("Simulation", "max_steps", fallback=0)
+    config.generation_seconds = parser.getfloat(
+        "Simulation", "generation_seconds", fallback=0.0
+    )
+    config.stop_at_threshold = parser.getboolean(
+        "Simulation", "stop_at_threshold", fallback=False
+    )
+
+
+class TruncatedFitness(float):
+    """
+    Fitness of a genome whose evaluation was cut short.
+
+    reason: "steps", "time" or "threshold" (str)
+    """
+
+    def __new__(cls, value, reason):
+        fitness = float.__new__(cls, value)
+        fitness.reason = reason
+        return fitness
+
+    def __getnewargs__(self):
+        return float(self), self.reason
+
+
+class Budget:
+    """
+    Budget of one evaluation.
+
+    config: NEAT configuration with the read_budget settings (neat.Config)
+    penalty: largest fitness a living agent can still lose (float)
+    """
+
+    def __init__(self, config, penalty=0.0):
+        self.max_steps = getattr(config, "max_steps", 0)
+        self.deadline = getattr(config, "generation_deadline", None)
+        self.penalty = penalty
+        self.steps = 0
+
+        self.threshold = None
+        # a threshold met on one of several courses says nothing about the
+        # aggregate fitness of all of them
+        courses = len(getattr(config, "course_seeds", None) or [None])
+        if getattr(config, "stop_at_threshold", False) and courses == 1:
+            # an evaluation may hold one genome (--workers) or only the ones
+            # missing from the fitness cache: min or mean over it says
+            # nothing about the population, the max of any part bounds it
+            if not config.no_fitness_termination and config.fitness_criterion == "max":
+                self.threshold = config.fitness_threshold
+
+    def exhausted(self, agents):
+        """
+        Check the budget before simulating the next frame.
+
+        agents: agents of the evaluation (common.agents.Agents)
+
+        return: reason to stop, None to go on (str)
+        """
+
+        if self.max_steps and self.steps >= self.max_steps:
+            return "steps"
+        if self.deadline is not None and time.time() > self.deadline:
+            return "time"
+        if self.threshold is not None:
+            lowest = agents.fitness.copy()
+            lowest[agents.rows] -= self.penalty
+            if lowest.max() >= self.threshold:
+                return "threshold"
+
+        self.steps += 1
+        return None
+
+
+class BudgetReporter(BaseReporter):
+    """Starts the clock of every generation and reports truncated evaluations."""
+
+    def __init__(self, config):
+        self.config = config
+        self.generation_truncated = []
+
+    def start_generation(self, generation):
+        seconds = getattr(self.config, "generation_seconds", 0)
+        self.config.generation_deadline = time.time() + seconds if seconds else None
+
+    def post_evaluate(self, config, population, species, best_genome):
+        reasons = {}
+        for genome in population.values():
+            if isinstance(genome.fitness, TruncatedFitness):
+                reasons[genome.fitness.reason] = (
+                    reasons.get(genome.fitness.reason, 0) + 1
+                )
+        self.generation_truncated.append(reasons)
+
+        if reasons:
+            counts = ", ".join(
+                "{0} {1}".format(n, reason) for reason, n in sorted(reasons.items())
+            )
+            print(
+                "Truncated evaluations: {0} ({1})".format(sum(reasons.values()), counts)
+            )
+        if isinstance(best_genome.fitness, TruncatedFitness):
+            print(
+                "Best fitness is a lower bound, stopped on {0}".format(
+                    best_genome.fitness.reason
+                )
+            )
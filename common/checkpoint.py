@@ -0,0 +1,149 @@
+"""
+Snapshots of a training run, to continue it after a crash.
+
+A Checkpointer saves the population, species, NEAT config and random state
+every few generations or minutes, as set in the [Checkpoint] section of the
+game's config file:
+
+    generation_interval    generations between checkpoints, 0 for no limit
+    time_interval_seconds  seconds between checkpoints, 0 for no limit
+    compresslevel          gzip level of the files, 1 (fast) to 9 (small)
+    filename_prefix        file name before the generation number
+
+Files are written to a temporary file first and renamed over the
+checkpoint, so a crash while saving never leaves a truncated one. Besides
+what neat.Checkpointer saves, a checkpoint keeps the run seed of the
+CourseSeeder, so a resumed run races the same courses and evolves the same
+genomes as a run that was never interrupted.
+"""
+
+import configparser
+import contextlib
+import gzip
+import os
+import pickle
+import random
+from itertools import count
+
+import neat
+
+from common.seeding import CourseSeeder
+
+
+class Checkpointer(neat.Checkpointer):
+    """
+    Saves the run at the end of a generation, atomically and compressed.
+
+    seeder: course seeds of the run (common.seeding.CourseSeeder)
+    generation_interval: generations between checkpoints, None for no limit (int)
+    time_interval_seconds: seconds between checkpoints, None for no limit (float)
+    filename_prefix: path of the files before the generation number (str)
+    compresslevel: gzip compression level (int)
+    """
+
+    def __init__(
+        self,
+        seeder,
+        generation_interval=5,
+        time_interval_seconds=600,
+        filename_prefix="neat-checkpoint-",
+        compresslevel=5,
+    ):
+        super().__init__(generation_interval, time_interval_seconds, filename_prefix)
+        self.seeder = seeder
+        self.compresslevel = compresslevel
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        """
+        Write the state the run starts the next generation with.
+
+        population: genomes after reproduction, evaluated in the next
+            generation (dict)
+        generation: generation that just ended (int)
+        """
+
+        filename = "{0}{1}".format(self.filename_prefix, generation)
+        print("Saving checkpoint to {0}".format(filename))
+
+        # the reporters hold open files and processes, the resumed run has its own
+        reporters = species_set.reporters
+        species_set.reporters = None
+        try:
+            data = {
+                "generation": generation + 1,
+                "config": config,
+                "population": population,
+                "species_set": species_set,
+                "random_state": random.getstate(),
+                "seed": self.seeder.seed,
+                "fixed_course": self.seeder.fixed,
+            }
+            tmp_path = filename + ".tmp"
+            try:
+                with open(tmp_path, "wb") as raw:
+                    with gzip.GzipFile(
+                        fileobj=raw, mode="wb", compresslevel=self.compresslevel
+                    ) as f:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                os.replace(tmp_path, filename)
+            except BaseException:
+                # open() itself may have failed, keep its error
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(tmp_path)
+                raise
+        finally:
+            species_set.reporters = reporters
+
+    @staticmethod
+    def restore_checkpoint(filename):
+        """
+        Continue a run from a checkpoint, restoring the global random state.
+
+        filename: checkpoint file (str)
+
+        return: population (neat.Population) and its course seeds, to add as
+            a reporter (common.seeding.CourseSeeder)
+        """
+
+        with gzip.open(filename, "rb") as f:
+            data = pickle.load(f)
+
+        random.setstate(data["random_state"])
+        config = data["config"]
+        population = data["population"]
+        p = neat.Population(
+            config, (population, data["species_set"], data["generation"])
+        )
+        p.species.reporters = p.reporters
+        # genome keys are handed out in order, the newest ones are all in population
+        p.reproduction.genome_indexer = count(max(population) + 1)
+
+        seeder = CourseSeeder(config, data["seed"], data["fixed_course"])
+        return p, seeder
+
+
+def read_checkpointer(config_path, seeder):
+    """
+    Set a Checkpointer up from the [Checkpoint] section of a config file.
+
+    config_path: game's config file (str)
+    seeder: course seeds of the run (common.seeding.CourseSeeder)
+
+    return: (Checkpointer)
+    """
+
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    generations = parser.getint("Checkpoint", "generation_interval", fallback=5)
+    seconds = parser.getfloat("Checkpoint", "time_interval_seconds", fallback=600)
+    return Checkpointer(
+        seeder,
+        generation_interval=generations or None,
+        time_interval_seconds=seconds or None,
+        filename_prefix=parser.get(
+            "Checkpoint", "filename_prefix", fallback="neat-checkpoint-"
+        ),
+        compresslevel=parser.getint("Checkpoint", "compresslevel", fallback=5),
+    )
@@ -0,0 +1,185 @@
+"""
+Collision tests shared by the games.
+
+Every sprite image gets one Shape, built once and reused for every agent,
+obstacle and frame. The games simulate whole populations in which many
+agents share one x (or y) coordinate, so vertical_hits (or horizontal_hits)
+work out once per pair of shapes and offset which offsets along the other
+axis collide, from the runs of opaque pixels of every column (or row). A
+frame then only looks the result up for each agent.
+
+With ANALYTIC set the masks are never consulted: two shapes collide when
+their opaque bounding boxes overlap. Such shapes can be built from plain
+numbers, so a simulation does not need any pygame surface.
+"""
+
+import numpy as np
+import pygame
+
+ANALYTIC = False
+
+_shapes = {}
+_hits = {}
+
+
+class Shape:
+    """
+    Collision footprint of a sprite image.
+
+    width: image width px (int)
+    height: image height px (int)
+    box: opaque area as (x, y, w, h) relative to image topleft (tuple)
+    mask: pixel mask, None for analytic-only shapes (pygame Mask)
+    """
+
+    def __init__(self, width, height, box=None, mask=None):
+        self.width = width
+        self.height = height
+        self.box = box if box is not None else (0, 0, width, height)
+        self.mask = mask
+        self._runs = {}
+
+    @classmethod
+    def from_surface(cls, surface, angle=0):
+        """
+        Build a shape from the opaque pixels of an image.
+
+        surface: sprite image (pygame Surface)
+        angle: rotation in degrees, as passed to pygame.transform.rotate (int)
+
+        return: (Shape)
+        """
+
+        if angle:
+            surface = pygame.transform.rotate(surface, angle)
+        mask = pygame.mask.from_surface(surface)
+        rects = mask.get_bounding_rects()
+        if rects:
+            box = tuple(rects[0].unionall(rects[1:]))
+        else:
+            box = (0, 0, 0, 0)
+
+        return cls(surface.get_width(), surface.get_height(), box, mask)
+
+    def column_runs(self):
+        """
+        Opaque pixels of every image column as runs of consecutive rows.
+
+        return: one list of (first_row, last_row) per column (list)
+        """
+
+        return self._cached_runs(0)
+
+    def row_runs(self):
+        """
+        Opaque pixels of every image row as runs of consecutive columns.
+
+        return: one list of (first_column, last_column) per row (list)
+        """
+
+        return self._cached_runs(1)
+
+    def _cached_runs(self, axis):
+        key = (ANALYTIC, axis)
+        if key not in self._runs:
+            self._runs[key] = self._line_runs(axis)
+        return self._runs[key]
+
+    def _line_runs(self, axis):
+        if ANALYTIC or self.mask is None:
+            x, y, w, h = self.box
+            if axis:
+                x, y, w, h = y, x, h, w
+            length = self.height if axis else self.width
+            return [[(y, y + h - 1)] if x <= c < x + w else [] for c in range(length)]
+
+        pixels = pygame.surfarray.array_red(self.mask.to_surface()) > 0
+        if axis:
+            pixels = pixels.T
+        runs = []
+        for column in pixels:
+            rows = np.flatnonzero(column)
+            if not len(rows):
+                runs.append([])
+                continue
+            breaks = np.flatnonzero(np.diff(rows) > 1)
+            firsts = np.concatenate(([rows[0]], rows[breaks + 1]))
+            lasts = np.concatenate((rows[breaks], [rows[-1]]))
+            runs.append(list(zip(firsts.tolist(), lasts.tolist())))
+        return runs
+
+
+def shape(surface, angle=0):
+    """
+    Return the cached shape of an image, building it on first use.
+
+    surface: sprite image (pygame Surface)
+    angle: rotation in degrees (int)
+
+    return: (Shape)
+    """
+
+    key = (surface, angle)
+    try:
+        return _shapes[key]
+    except KeyError:
+        _shapes[key] = Shape.from_surface(surface, angle)
+        return _shapes[key]
+
+
+def vertical_hits(shape_a, shape_b, dx):
+    """
+    Find every vertical offset at which two shapes collide.
+
+    shape_a, shape_b: (Shape)
+    dx: x of shape_b minus x of shape_a, px (int)
+
+    return: lowest offset (int) and hits, where hits[i] tells if the shapes
+        collide when y of shape_b minus y of shape_a is lowest + i
+        (numpy array of bool)
+    """
+
+    return _hits_along(shape_a, shape_b, dx, 0)
+
+
+def horizontal_hits(shape_a, shape_b, dy):
+    """
+    Find every horizontal offset at which two shapes collide.
+
+    shape_a, shape_b: (Shape)
+    dy: y of shape_b minus y of shape_a, px (int)
+
+    return: lowest offset (int) and hits, where hits[i] tells if the shapes
+        collide when x of shape_b minus x of shape_a is lowest + i
+        (numpy array of bool)
+    """
+
+    return _hits_along(shape_a, shape_b, dy, 1)
+
+
+def _hits_along(shape_a, shape_b, offset, axis):
+    key = (shape_a, shape_b, offset, ANALYTIC, axis)
+    try:
+        return _hits[key]
+    except KeyError:
+        pass
+
+    if axis:
+        length_a, length_b = shape_a.height, shape_b.height
+        span_a, span_b = shape_a.width, shape_b.width
+        runs_a, runs_b = shape_a.row_runs(), shape_b.row_runs()
+    else:
+        length_a, length_b = shape_a.width, shape_b.width
+        span_a, span_b = shape_a.height, shape_b.height
+        runs_a, runs_b = shape_a.column_runs(), shape_b.column_runs()
+
+    lowest = 1 - span_b
+    diff = np.zeros(span_a + span_b, dtype=int)
+    for line in range(max(0, offset), min(length_a, offset + length_b)):
+        for first_a, last_a in runs_a[line]:
+            for first_b, last_b in runs_b[line - offset]:
+                diff[first_a - last_b - lowest] += 1
+                diff[last_a - first_b - lowest + 1] -= 1
+
+    _hits[key] = (lowest, np.cumsum(diff[:-1]) > 0)
+    return _hits[key]
@@ -0,0 +1,120 @@
+"""
+Fitness over several obstacle courses per generation.
+
+One random course makes fitness noisy: a genome may just have been lucky.
+With the [Simulation] settings
+
+    courses           courses every genome races per generation
+    course_aggregate  mean, min or quantile of the per-course fitness
+    course_quantile   which quantile, for course_aggregate = quantile
+
+CourseSeeder puts one seed per course on the NEAT config, so every worker
+builds the same courses, and evaluate_courses plays them one after another,
+each with the whole batch of agents, before combining the scores.
+"""
+
+import configparser
+
+import numpy as np
+
+from common.budget import TruncatedFitness
+
+AGGREGATES = ("mean", "min", "quantile")
+
+
+def read_courses(config, config_path):
+    """
+    Copy the course settings of a config file onto a NEAT config.
+
+    config: NEAT configuration (neat.Config)
+    config_path: file the configuration was read from (str)
+    """
+
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    config.courses = parser.getint("Simulation", "courses", fallback=1)
+    config.course_aggregate = parser.get(
+        "Simulation", "course_aggregate", fallback="mean"
+    )
+    config.course_quantile = parser.getfloat(
+        "Simulation", "course_quantile", fallback=0.25
+    )
+    if config.courses < 1:
+        raise ValueError("courses must be at least 1, not {0}".format(config.courses))
+    if config.course_aggregate not in AGGREGATES:
+        raise ValueError(
+            "Unknown course_aggregate: {0!r}".format(config.course_aggregate)
+        )
+
+
+def course_key(config):
+    """
+    Name of the courses an evaluation runs on, e.g. to cache its fitness.
+
+    config: NEAT configuration (neat.Config)
+
+    return: seed or seeds and aggregate, None for an unseeded course (str)
+    """
+
+    seeds = getattr(config, "course_seeds", None)
+    if not seeds or len(seeds) == 1:
+        seed = getattr(config, "course_seed", None)
+        return None if seed is None else str(seed)
+
+    aggregate = config.course_aggregate
+    if aggregate == "quantile":
+        aggregate += str(config.course_quantile)
+    return "{0}/{1}".format("-".join(str(s) for s in seeds), aggregate)
+
+
+def aggregate(fitness, config):
+    """
+    Combine the fitness of every course.
+
+    fitness: one row per course, one column per genome (numpy float array)
+    config: NEAT configuration with the read_courses settings (neat.Config)
+
+    return: one fitness per genome (numpy float array)
+    """
+
+    if config.course_aggregate == "min":
+        return fitness.min(axis=0)
+    if config.course_aggregate == "quantile":
+        return np.quantile(fitness, config.course_quantile, axis=0)
+    return fitness.mean(axis=0)
+
+
+def evaluate_courses(play, genomes, config, *args):
+    """
+    Play every course of the generation and aggregate the fitness.
+
+    A genome cut short on any course keeps a TruncatedFitness: all three
+    aggregates grow with each per-course score, so it is still a lower bound.
+
+    play: game function called as play(genomes, config, *args) (callable)
+    genomes: (genome_id, genome) pairs (list)
+    config: NEAT configuration (neat.Config)
+    """
+
+    seeds = getattr(config, "course_seeds", None)
+    if not seeds or len(seeds) == 1:
+        play(genomes, config, *args)
+        return
+
+    fitness = np.zeros((len(seeds), len(genomes)))
+    reasons = [None] * len(genomes)
+    try:
+        for k, seed in enumerate(seeds):
+            config.course_seed = seed
+            play(genomes, config, *args)
+            for i, (_, genome) in enumerate(genomes):
+                fitness[k, i] = genome.fitness
+                if reasons[i] is None and isinstance(genome.fitness, TruncatedFitness):
+                    reasons[i] = genome.fitness.reason
+    finally:
+        config.course_seed = seeds[0]
+
+    for (_, genome), value, reason in zip(
+        genomes, aggregate(fitness, config).tolist(), reasons
+    ):
+        genome.fitness = value if reason is None else TruncatedFitness(value, reason)
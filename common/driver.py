@@ -0,0 +1,307 @@
+"""
+Training NEAT networks on any game environment.
+
+A Driver holds what a training run of one game needs besides the game
+itself (see common.environment): it seeds the run and its courses, reads
+the [Simulation] and [Checkpoint] settings, resumes checkpoints, adds the
+reporters and both caches, and evaluates every generation in this process
+or in a pool of workers. argument_parser() builds the command line the
+games share, configure() applies it.
+"""
+
+import argparse
+import random
+
+import neat
+
+from common import collision, environment
+from common.budget import BudgetReporter, read_budget
+from common.checkpoint import Checkpointer, read_checkpointer
+from common.courses import evaluate_courses, read_courses
+from common.feed_forward import NetworkCache, NetworkCacheReporter
+from common.fitness_cache import FitnessCache, FitnessCacheReporter
+from common.network_file import load_networks, save_genomes
+from common.profiling import PROFILERS, ProfileReporter
+from common.seeding import CourseSeeder
+
+
+def load_config(config_path):
+    """
+    Read the NEAT settings of a game.
+
+    config_path: game's config file (str)
+
+    return: (neat.Config)
+    """
+
+    return neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        config_path,
+    )
+
+
+class Driver:
+    """
+    Evaluates and trains genomes on one game.
+
+    game: builds the game for a number of agents, e.g. a
+        common.environment.Environment subclass (callable)
+    name: keeps the cached fitness of the game apart from other games (str)
+    generations: generations a run trains for (int)
+    headless: skip window, rendering and frame-rate cap (bool)
+    draw_top: draw only this many of the fittest agents, None for all (int)
+    generation: number of the generation evaluated last (int)
+    """
+
+    def __init__(self, game, name, generations, headless=False, draw_top=None):
+        self.game = game
+        self.name = name
+        self.generations = generations
+        self.headless = headless
+        self.draw_top = draw_top
+        self.generation = 0
+
+    def play(self, genomes, config, render=True, gen=0, nets=None):
+        """
+        Play one course with a batch of genomes.
+
+        genomes: (genome_id, genome) pairs (list)
+        config: NEAT configuration (neat.Config)
+        render: open a window and draw every frame (bool)
+        gen: number of generation shown on screen (int)
+        nets: networks of the genomes, compiled from them if None (FeedForwardBatch)
+
+        return: None
+        """
+
+        environment.play(
+            self.game(len(genomes)),
+            genomes,
+            config,
+            render,
+            gen,
+            nets,
+            self.draw_top,
+        )
+
+    def evaluate(self, genomes, config):
+        """
+        Fitness function of a generation, played by this process.
+
+        return: None
+        """
+
+        self.generation += 1
+        evaluate_courses(self.play, genomes, config, not self.headless, self.generation)
+
+    def eval_genome(self, genome, config):
+        """
+        Run a single genome headless, e.g. in a neat.ParallelEvaluator worker.
+
+        return: fitness (float)
+        """
+
+        evaluate_courses(self.play, [(genome.key, genome)], config, False)
+        return genome.fitness
+
+    def configure(self, args):
+        """
+        Apply the options of argument_parser().
+
+        args: parsed command line (argparse.Namespace)
+        """
+
+        collision.ANALYTIC = args.box_hitboxes
+        self.headless = args.headless
+        self.draw_top = args.draw_top
+
+    def run(
+        self,
+        config_path,
+        workers=1,
+        seed=None,
+        fixed_course=False,
+        cache_path=None,
+        resume=None,
+        profile=None,
+        winner_path=None,
+    ):
+        """
+        Run simulation and train new networks.
+
+        config_path: game's config file (str)
+        workers: number of processes evaluating genomes, headless if > 1 (int)
+        seed: seed of evolution and obstacle courses, random if None (int)
+        fixed_course: same course in every generation (bool)
+        cache_path: SQLite file keeping fitness across runs, None for memory only (str)
+        resume: checkpoint file to continue a run from, None for a new run (str)
+        profile: reporter timing every generation, None for none
+            (common.profiling.ProfileReporter)
+        winner_path: network file to save the best genome to, None for none (str)
+
+        return: best genome, None if a resumed run had already finished
+            (neat.DefaultGenome)
+        """
+
+        if resume is None:
+            if seed is None:
+                seed = random.randrange(2 ** 32)
+            print("Seed:", seed)
+            random.seed(seed)
+
+            config = load_config(config_path)
+            read_budget(config, config_path)
+            read_courses(config, config_path)
+
+            p = neat.Population(config)
+            seeder = CourseSeeder(config, seed, fixed_course)
+        else:
+            # seed, course and settings are those of the checkpointed run
+            p, seeder = Checkpointer.restore_checkpoint(resume)
+            config = p.config
+            self.generation = p.generation
+            print(
+                "Resuming seed {0} at generation {1}".format(seeder.seed, p.generation)
+            )
+            if p.generation >= self.generations:
+                print("Run already finished after", self.generations, "generations")
+                return None
+
+        p.add_reporter(seeder)
+        p.add_reporter(neat.StdOutReporter(True))
+        if profile is not None:
+            p.add_reporter(profile)
+        p.add_reporter(neat.StatisticsReporter())
+        p.add_reporter(BudgetReporter(config))
+        namespace = self.name + "-box" if collision.ANALYTIC else self.name
+        cache = FitnessCache(path=cache_path, namespace=namespace)
+        p.add_reporter(FitnessCacheReporter(cache))
+        p.add_reporter(NetworkCacheReporter(NetworkCache()))
+        checkpointer = read_checkpointer(config_path, seeder)
+        if resume is not None:
+            # count the interval from where the run resumed, not from generation 0
+            checkpointer.last_generation_checkpoint = p.generation - 1
+        p.add_reporter(checkpointer)
+
+        if workers > 1:
+            evaluator = neat.ParallelEvaluator(workers, self.eval_genome)
+            winner = p.run(
+                cache.wrap(evaluator.evaluate), self.generations - p.generation
+            )
+        else:
+            winner = p.run(cache.wrap(self.evaluate), self.generations - p.generation)
+
+        if winner_path is not None and winner is not None:
+            save_genomes(winner_path, [(winner.key, winner)], config)
+        return winner
+
+    def replay(self, config_path, genome_path, seed=None):
+        """
+        Run simulation with trained networks.
+
+        config_path: game's config file (str)
+        genome_path: network file of one or more networks (str)
+        seed: course seed, the same seed replays the same run (int)
+        """
+
+        config = load_config(config_path)
+        config.course_seed = seed
+
+        archive = load_networks(genome_path)
+        # only the networks are stored, blank genomes take the fitness
+        genomes = [(key, neat.DefaultGenome(key)) for key in archive.keys.tolist()]
+        self.play(genomes, config, not self.headless, 1, archive.batch())
+
+
+def argument_parser(description=None):
+    """
+    Command line shared by the games, see Driver.configure and profile_reporter.
+
+    description: shown by --help (str)
+
+    return: (argparse.ArgumentParser)
+    """
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="train without a window, rendering or frame-rate cap",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="evaluate genomes in this many processes (always headless if > 1)",
+    )
+    parser.add_argument(
+        "--box-hitboxes",
+        action="store_true",
+        help="collide on opaque bounding boxes instead of pixel masks",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="seed evolution and obstacle courses (random if not given)",
+    )
+    parser.add_argument(
+        "--draw-top",
+        type=int,
+        metavar="N",
+        help="draw only the N fittest agents (all by default)",
+    )
+    parser.add_argument(
+        "--fixed-course",
+        action="store_true",
+        help="race every generation on the same course, caching unchanged genomes",
+    )
+    parser.add_argument(
+        "--fitness-cache",
+        metavar="PATH",
+        help="also keep cached fitness in this SQLite file, across runs",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="CHECKPOINT",
+        help="continue the run saved in a checkpoint file",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="print the time of every phase per generation, also to a .csv or .json",
+    )
+    parser.add_argument(
+        "--profile-generation",
+        type=int,
+        metavar="N",
+        help="run generation N under a profiler and save its report",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="profiler for --profile-generation",
+    )
+    return parser
+
+
+def profile_reporter(args, profile_prefix):
+    """
+    Build the reporter asked for by --profile and --profile-generation.
+
+    args: parsed command line of argument_parser() (argparse.Namespace)
+    profile_prefix: path of a profile before the generation number (str)
+
+    return: (common.profiling.ProfileReporter), None if not asked for
+    """
+
+    if args.profile is None and args.profile_generation is None:
+        return None
+    return ProfileReporter(
+        args.profile or None, args.profile_generation, args.profiler, profile_prefix
+    )
@@ -0,0 +1,151 @@
+"""
+Games as environments that a whole population plays at once.
+
+An Environment simulates one game for every agent of an evaluation, one
+array row per agent as in common.agents.Agents. play() runs any of them
+with the networks of the genomes. Every frame it asks the environment what
+the living agents observe, activates their networks on it and steps the
+game with the outputs, adding the rewards to the fitness and removing the
+agents that are done. Budgets, phase timing, rendering and the network
+cache work the same for every game this way; common.driver trains on one.
+
+A step runs up to the next observation. Where a frame changes the game
+before the agents look, e.g. birds fall before they see the pipes, the step
+ends with that change and reset() makes it for the first frame.
+"""
+
+from abc import ABC, abstractmethod
+
+import pygame
+
+from common import timing
+from common.agents import Agents
+from common.budget import Budget
+from common.feed_forward import FeedForwardBatch
+from common.render import top_agents
+
+
+class Environment(ABC):
+    """
+    One game for a number of agents, one row per agent.
+
+    size: number of agents (int)
+    score: obstacles passed so far, shown on screen (int)
+    alive_reward: fitness an agent earns in every frame it lives, added
+        before the rewards of the step (float)
+    collision_penalty: most fitness a living agent can still lose (float)
+    """
+
+    alive_reward = 0.1
+    collision_penalty = 1
+
+    def __init__(self, size):
+        self.size = size
+        self.score = 0
+
+    @abstractmethod
+    def reset(self, seed):
+        """
+        Start a new game with every agent alive.
+
+        seed: course seed, None for a random course (int)
+        """
+
+    @abstractmethod
+    def observe(self, rows):
+        """
+        Network inputs of the living agents.
+
+        rows: rows of the living agents (numpy int array)
+
+        return: one row of inputs per agent, or one tuple of inputs every
+            agent shares (numpy float array / tuple)
+        """
+
+    @abstractmethod
+    def step(self, rows, actions):
+        """
+        Simulate one frame.
+
+        rows: rows of the living agents (numpy int array)
+        actions: network outputs, one row per agent of rows (numpy float array)
+
+        return: rewards and whether each agent of rows is out of the game
+            (numpy float array, numpy bool array)
+        """
+
+    @abstractmethod
+    def open(self):
+        """Open the game window, before the first frame is drawn."""
+
+    @abstractmethod
+    def render(self, rows, gen, alive):
+        """
+        Draw the frame.
+
+        rows: rows of the agents to draw (numpy int array)
+        gen: number of generation shown on screen (int)
+        alive: living agents shown on screen (int)
+        """
+
+
+def play(env, genomes, config, render=False, gen=0, nets=None, draw_top=None):
+    """
+    Play a game until every agent is out or the budget runs out.
+
+    env: game for len(genomes) agents (Environment)
+    genomes: (genome_id, genome) pairs (list)
+    config: NEAT configuration (neat.Config)
+    render: open a window and draw every frame (bool)
+    gen: number of generation shown on screen (int)
+    nets: networks of the genomes, compiled from them if None (FeedForwardBatch)
+    draw_top: draw only this many of the fittest agents, None for all (int)
+
+    return: None
+    """
+
+    timer = timing.TIMER
+    timer.mark()
+    if nets is None:
+        nets = FeedForwardBatch.create(genomes, config)
+    timer.lap("networks")
+    agents = Agents(genomes)
+    budget = Budget(config, penalty=env.collision_penalty)
+    truncated = None
+
+    env.reset(getattr(config, "course_seed", None))
+    if render:
+        env.open()
+        clock = pygame.time.Clock()
+
+    while True:
+        if render:
+            clock.tick(30)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    quit()
+
+        if len(agents) == 0:
+            break
+
+        truncated = budget.exhausted(agents)
+        if truncated:
+            break
+        timer.start(len(agents))
+
+        rows = agents.rows
+        output = nets.activate(env.observe(rows), rows)
+        timer.lap("inference", len(rows))
+
+        agents.fitness[rows] += env.alive_reward
+        rewards, dones = env.step(rows, output)
+        agents.fitness[rows] += rewards
+        agents.remove_where(dones)
+
+        if render:
+            drawn = agents.rows[top_agents(agents, draw_top)]
+            env.render(drawn, gen, len(agents))
+            timer.lap("render")
+
+    agents.assign_fitness(truncated)
@@ -0,0 +1,454 @@
+"""
+Feed-forward networks of a whole population, evaluated with NumPy.
+
+Every genome is compiled into the same layered form neat-python uses
+(neat.graphs.feed_forward_layers): one value slot per node and, per layer,
+the nodes to compute and the links feeding them. A FeedForwardBatch pads
+the networks of a population to a common slot count and stacks their
+layers, so one call to activate runs every network for one frame.
+
+Genomes with the same enabled connections share their layer ordering (a
+Topology). While a NetworkCache is set as CACHE, normally by
+NetworkCacheReporter, FeedForwardBatch.create also reuses the networks of
+genomes that have not changed since they were last compiled.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from neat.graphs import feed_forward_layers
+from neat.reporting import BaseReporter
+
+
+def _sigmoid(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _tanh(z):
+    z = np.clip(2.5 * z, -60.0, 60.0)
+    return np.tanh(z)
+
+
+def _relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def _identity(z):
+    return z
+
+
+# same formulas as neat.activations, index is the activation id
+ACTIVATIONS = ["sigmoid", "tanh", "relu", "identity"]
+_ACTIVATION_FUNCS = [_sigmoid, _tanh, _relu, _identity]
+
+# NetworkCache used by FeedForwardBatch.create, None to compile every time
+CACHE = None
+
+
+def _genes_hash(genome):
+    # like common.fitness_cache.genome_hash, but cheaper and only for this process
+    return hash(
+        (
+            tuple(
+                (key, ng.bias, ng.response, ng.activation, ng.aggregation)
+                for key, ng in genome.nodes.items()
+            ),
+            tuple(
+                (key, cg.weight, cg.enabled) for key, cg in genome.connections.items()
+            ),
+        )
+    )
+
+
+class CompiledNetwork:
+    """
+    Layered arrays of a single feed-forward network.
+
+    Slots 0..num_inputs-1 hold the inputs, the next num_outputs slots the
+    outputs and the remaining ones hidden nodes. Nodes are stored layer by
+    layer, links grouped by the node they feed, in neat-python's order.
+
+    width: number of value slots (int)
+    node_slot, node_layer, node_activation: per node (numpy int arrays)
+    node_bias, node_response: per node (numpy float arrays)
+    link_source: slot read by each link (numpy int array)
+    link_node: node fed by each link (numpy int array)
+    link_weight: (numpy float array)
+    """
+
+    def __init__(
+        self,
+        width,
+        node_slot,
+        node_layer,
+        node_activation,
+        node_bias,
+        node_response,
+        link_source,
+        link_node,
+        link_weight,
+    ):
+        self.width = width
+        self.node_slot = node_slot
+        self.node_layer = node_layer
+        self.node_activation = node_activation
+        self.node_bias = node_bias
+        self.node_response = node_response
+        self.link_source = link_source
+        self.link_node = link_node
+        self.link_weight = link_weight
+
+    @staticmethod
+    def create(genome, config, topologies=None):
+        """
+        Compile a genome, like neat.nn.FeedForwardNetwork.create.
+
+        genome: (neat.DefaultGenome)
+        config: NEAT configuration (neat.Config)
+        topologies: layer orderings already compiled, reused and added to by
+            genomes with the same enabled connections (Topologies)
+
+        return: (CompiledNetwork)
+        """
+
+        genome_config = config.genome_config
+        connections = tuple(cg.key for cg in genome.connections.values() if cg.enabled)
+        if topologies is None:
+            topology = Topology(
+                genome_config.input_keys, genome_config.output_keys, connections
+            )
+        else:
+            topology = topologies.get(
+                genome_config.input_keys, genome_config.output_keys, connections
+            )
+
+        nodes = [genome.nodes[node] for node in topology.node_keys]
+        for ng in nodes:
+            if ng.aggregation != "sum":
+                raise ValueError(
+                    "Aggregation not supported in batches: " + ng.aggregation
+                )
+            if ng.activation not in ACTIVATIONS:
+                raise ValueError(
+                    "Activation not supported in batches: " + ng.activation
+                )
+
+        return CompiledNetwork(
+            topology.width,
+            topology.node_slot,
+            topology.node_layer,
+            np.array([ACTIVATIONS.index(ng.activation) for ng in nodes], dtype=int),
+            np.array([ng.bias for ng in nodes], dtype=float),
+            np.array([ng.response for ng in nodes], dtype=float),
+            topology.link_source,
+            topology.link_node,
+            np.array(
+                [genome.connections[key].weight for key in topology.link_keys],
+                dtype=float,
+            ),
+        )
+
+
+class Topology:
+    """
+    Layer ordering of one set of enabled connections, shared by all genomes
+    that have it.
+
+    width: number of value slots (int)
+    node_keys: genome node of every compiled node, in order (list)
+    node_slot, node_layer: per node (numpy int arrays)
+    link_keys: connection of every link, in order (list)
+    link_source, link_node: per link (numpy int arrays)
+    """
+
+    def __init__(self, input_keys, output_keys, connections):
+        """
+        input_keys, output_keys: of the genome config (list)
+        connections: enabled connection keys, in the genome's order (tuple)
+        """
+
+        layers = feed_forward_layers(input_keys, output_keys, connections)
+        feeding = {}
+        for inode, onode in connections:
+            feeding.setdefault(onode, []).append((inode, onode))
+
+        slots = {key: i for i, key in enumerate(input_keys + output_keys)}
+        self.node_keys = []
+        node_layer = []
+        self.link_keys = []
+        link_node = []
+        for depth, layer in enumerate(layers):
+            for node in layer:
+                slots.setdefault(node, len(slots))
+                for key in feeding.get(node, ()):
+                    self.link_keys.append(key)
+                    link_node.append(len(self.node_keys))
+                self.node_keys.append(node)
+                node_layer.append(depth)
+
+        self.width = len(slots)
+        self.node_slot = np.array([slots[node] for node in self.node_keys], dtype=int)
+        self.node_layer = np.array(node_layer, dtype=int)
+        self.link_source = np.array(
+            [slots[inode] for inode, _ in self.link_keys], dtype=int
+        )
+        self.link_node = np.array(link_node, dtype=int)
+
+
+class Topologies:
+    """
+    LRU cache of Topology by input, output and enabled connection keys.
+
+    max_size: topologies kept (int)
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, input_keys, output_keys, connections):
+        """
+        Look a topology up, compiling it on a miss.
+
+        return: (Topology)
+        """
+
+        key = (tuple(input_keys), tuple(output_keys), connections)
+        topology = self._entries.get(key)
+        if topology is None:
+            self.misses += 1
+            topology = Topology(input_keys, output_keys, connections)
+            self._entries[key] = topology
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+        self._entries.move_to_end(key)
+        return topology
+
+
+class NetworkCache:
+    """
+    Compiled networks of the genomes of a run, reused while they are unchanged.
+
+    Networks are keyed by genome key. neat-python never changes a genome once
+    it is in the population, so the same genome object gets its network back
+    at once; any other genome with that key only gets it if a hash of the
+    genes that shape the network matches, e.g. after resuming a checkpoint.
+    Elites and genomes played on several courses are compiled once, genomes
+    that left the population are dropped by retain(), and new genomes with a
+    known set of enabled connections reuse its layer ordering.
+
+    max_size: networks kept, the least recently used go first (int)
+    topologies: layer orderings shared between genomes (Topologies)
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.topologies = Topologies(max_size)
+        self.hits = 0
+        self.misses = 0
+        # genome key: (genome, hash of its genes or None until needed, network)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, genome, config):
+        """
+        Compiled network of a genome, compiling it on a miss.
+
+        genome: (neat.DefaultGenome)
+        config: NEAT configuration (neat.Config)
+
+        return: (CompiledNetwork)
+        """
+
+        key = genome.key
+        entry = self._entries.get(key)
+        genes = None
+        if entry is not None:
+            cached, cached_genes, net = entry
+            if cached is genome:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return net
+
+            genes = _genes_hash(genome)
+            if cached_genes is None:
+                cached_genes = _genes_hash(cached)
+            if genes == cached_genes:
+                self.hits += 1
+                self._entries[key] = (genome, genes, net)
+                self._entries.move_to_end(key)
+                return net
+
+        self.misses += 1
+        net = CompiledNetwork.create(genome, config, self.topologies)
+        self._entries[key] = (genome, genes, net)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return net
+
+    def retain(self, genome_keys):
+        """
+        Drop the networks of genomes that are gone.
+
+        genome_keys: genomes still in the population (set or dict)
+        """
+
+        for key in [key for key in self._entries if key not in genome_keys]:
+            del self._entries[key]
+
+
+class FeedForwardBatch:
+    """
+    Many feed-forward networks evaluated together, one row per network.
+
+    num_inputs, num_outputs: (int)
+    networks: compiled networks, one per row (list)
+    """
+
+    def __init__(self, num_inputs, num_outputs, networks):
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.size = len(networks)
+        self.width = max([num_inputs + num_outputs] + [net.width for net in networks])
+
+        offsets = np.cumsum([0] + [len(net.node_slot) for net in networks])
+        rows = np.repeat(
+            np.arange(self.size), [len(net.node_slot) for net in networks]
+        ).astype(int)
+        link_rows = np.repeat(
+            np.arange(self.size), [len(net.link_node) for net in networks]
+        ).astype(int)
+
+        def join(name, dtype):
+            arrays = [getattr(net, name) for net in networks]
+            if not arrays:
+                return np.zeros(0, dtype=dtype)
+            return np.concatenate(arrays).astype(dtype)
+
+        node_index = rows * self.width + join("node_slot", int)
+        node_layer = join("node_layer", int)
+        node_activation = join("node_activation", int)
+        node_bias = join("node_bias", float)
+        node_response = join("node_response", float)
+        link_source = link_rows * self.width + join("link_source", int)
+        link_node = offsets[link_rows] + join("link_node", int)
+        link_weight = join("link_weight", float)
+
+        # per layer: nodes to write, their parameters and the links feeding them
+        self.layers = []
+        num_layers = node_layer.max() + 1 if len(node_layer) else 0
+        for depth in range(num_layers):
+            nodes = np.flatnonzero(node_layer == depth)
+            position = np.full(len(node_layer), -1)
+            position[nodes] = np.arange(len(nodes))
+            links = np.flatnonzero(position[link_node] >= 0)
+            activation = node_activation[nodes]
+            groups = [
+                (_ACTIVATION_FUNCS[a], np.flatnonzero(activation == a))
+                for a in np.unique(activation)
+            ]
+            self.layers.append(
+                (
+                    node_index[nodes],
+                    node_bias[nodes],
+                    node_response[nodes],
+                    link_source[links],
+                    position[link_node[links]],
+                    link_weight[links],
+                    groups,
+                )
+            )
+
+    @staticmethod
+    def create(genomes, config):
+        """
+        Compile the networks of a population, through CACHE if it is set.
+
+        genomes: (genome_id, genome) pairs (list)
+        config: NEAT configuration (neat.Config)
+
+        return: (FeedForwardBatch)
+        """
+
+        if CACHE is None:
+            networks = [CompiledNetwork.create(g, config) for _, g in genomes]
+        else:
+            networks = [CACHE.get(g, config) for _, g in genomes]
+        return FeedForwardBatch(
+            config.genome_config.num_inputs, config.genome_config.num_outputs, networks
+        )
+
+    def activate(self, inputs, rows=None):
+        """
+        Run networks on one set of inputs each.
+
+        inputs: one row of inputs per network (2D array-like)
+        rows: networks the inputs belong to, default all of them (array-like)
+
+        return: one row of outputs per input row (numpy array)
+        """
+
+        values = np.zeros((self.size, self.width))
+        if rows is None:
+            rows = slice(None)
+        values[rows, : self.num_inputs] = inputs
+
+        flat = values.reshape(-1)
+        for nodes, bias, response, source, target, weight, groups in self.layers:
+            total = np.bincount(target, flat[source] * weight, minlength=len(nodes))
+            z = bias + response * total
+            for func, members in groups:
+                z[members] = func(z[members])
+            flat[nodes] = z
+
+        return values[rows, self.num_inputs : self.num_inputs + self.num_outputs]
+
+
+class NetworkCacheReporter(BaseReporter):
+    """
+    Sets a NetworkCache as CACHE for each generation, drops the networks of
+    genomes that left the population and prints how many were reused.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._previous = None
+        self._hits = 0
+        self._misses = 0
+        self._topology_hits = 0
+
+    def start_generation(self, generation):
+        global CACHE
+        self._previous = CACHE
+        CACHE = self.cache
+
+    def post_evaluate(self, config, population, species, best_genome):
+        global CACHE
+        CACHE = self._previous
+
+        cache = self.cache
+        hits = cache.hits - self._hits
+        misses = cache.misses - self._misses
+        shared = cache.topologies.hits - self._topology_hits
+        self._hits = cache.hits
+        self._misses = cache.misses
+        self._topology_hits = cache.topologies.hits
+        print(
+            "Network cache: {0} reused, {1} compiled ({2} on a known topology)".format(
+                hits, misses, shared
+            )
+        )
+
+    def end_generation(self, config, population, species_set):
+        self.cache.retain(population)
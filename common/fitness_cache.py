@@ -0,0 +1,167 @@
+"""
+Memoized fitness for genomes evaluated on seeded courses.
+
+With a seeded course a genome's fitness depends only on its genes, so a
+genome that survives into the next generation unchanged (elitism) does not
+have to be simulated again. FitnessCache keys each result by a hash of the
+genome's nodes and enabled connections plus the course seed, keeps the
+most recently used entries in memory and can back them with an SQLite file
+that outlives the run.
+"""
+
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+from neat.reporting import BaseReporter
+
+from common.budget import TruncatedFitness
+from common.courses import course_key
+
+
+def genome_hash(genome):
+    """
+    Hash the genes that shape the network of a genome.
+
+    genome: (neat.DefaultGenome)
+
+    return: hex digest (str)
+    """
+
+    nodes = sorted(
+        (key, ng.bias, ng.response, ng.activation, ng.aggregation)
+        for key, ng in genome.nodes.items()
+    )
+    connections = sorted(
+        (key, cg.weight) for key, cg in genome.connections.items() if cg.enabled
+    )
+    return hashlib.sha1(repr((nodes, connections)).encode()).hexdigest()
+
+
+class FitnessCache:
+    """
+    LRU cache of fitness values with an optional on-disk store.
+
+    max_size: entries kept in memory (int)
+    path: SQLite file to read and write through, None for memory only (str)
+    namespace: kept apart from other games / settings in one file (str)
+    """
+
+    def __init__(self, max_size=10000, path=None, namespace=""):
+        self.max_size = max_size
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, value REAL)"
+            )
+
+    def key(self, genome, course):
+        """
+        Cache key of a genome evaluated on a course.
+
+        course: seed or common.courses.course_key of the course (str)
+
+        return: (str)
+        """
+
+        return "{}:{}:{}".format(self.namespace, course, genome_hash(genome))
+
+    def get(self, key):
+        """
+        Look a fitness up, counting a hit or a miss.
+
+        return: fitness, None if not cached (float)
+        """
+
+        value = self._entries.get(key)
+        if value is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT value FROM fitness WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value = row[0]
+                self._remember(key, value)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store a fitness in memory and, if configured, on disk."""
+
+        self._remember(key, value)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fitness VALUES (?, ?)", (key, value)
+            )
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def wrap(self, fitness_function):
+        """
+        Make a NEAT fitness function skip genomes whose fitness is cached.
+
+        fitness_function: called as fitness_function(genomes, config) (callable)
+
+        return: fitness function with the same signature (callable)
+        """
+
+        def evaluate(genomes, config):
+            course = course_key(config)
+            if course is None:
+                # an unseeded course is different every time
+                fitness_function(genomes, config)
+                return
+
+            missing = []
+            for genome_id, genome in genomes:
+                key = self.key(genome, course)
+                fitness = self.get(key)
+                if fitness is None:
+                    missing.append((key, (genome_id, genome)))
+                else:
+                    genome.fitness = fitness
+
+            if missing:
+                fitness_function([pair for _, pair in missing], config)
+            for key, (_, genome) in missing:
+                # a cut-short run is not the genome's real score
+                if not isinstance(genome.fitness, TruncatedFitness):
+                    self.put(key, genome.fitness)
+            if self._db is not None:
+                self._db.commit()
+
+        return evaluate
+
+
+class FitnessCacheReporter(BaseReporter):
+    """Prints the cache hits and misses of every generation."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.generation_hits = []
+        self.generation_misses = []
+        self._hits = 0
+        self._misses = 0
+
+    def post_evaluate(self, config, population, species, best_genome):
+        hits = self.cache.hits - self._hits
+        misses = self.cache.misses - self._misses
+        self._hits = self.cache.hits
+        self._misses = self.cache.misses
+        self.generation_hits.append(hits)
+        self.generation_misses.append(misses)
+
+        print("Fitness cache: {0} hits, {1} misses".format(hits, misses))
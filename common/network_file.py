@@ -0,0 +1,179 @@
+"""
+Trained networks stored as typed arrays instead of pickled genomes.
+
+A network file holds any number of compiled networks (see
+common.feed_forward.CompiledNetwork), e.g. one champion or an archive of
+thousands for a tournament. It only has plain little-endian arrays, so
+reading it runs no code from the file and does not depend on the Python or
+neat-python version. The arrays are memory-mapped and every network is a
+view into them, so loading copies nothing until the networks are stacked
+into a FeedForwardBatch.
+
+Layout, every section starting at a multiple of 8 bytes:
+
+    magic            8 bytes, b"NEATNET1"
+    header           int64 count, num_inputs, num_outputs, 0
+    table            int64 (count, 4): genome key, width, nodes, links
+    node ints        int32 (3, total nodes): slot, layer, activation id
+    node floats      float64 (2, total nodes): bias, response
+    link ints        int32 (2, total links): source slot, node
+    link weights     float64 (total links)
+
+Activation ids index common.feed_forward.ACTIVATIONS.
+"""
+
+import numpy as np
+
+from common.feed_forward import CompiledNetwork, FeedForwardBatch
+
+MAGIC = b"NEATNET1"
+
+
+def _padded(nbytes):
+    return -(-nbytes // 8) * 8
+
+
+class NetworkArchive:
+    """
+    Networks read from a network file.
+
+    keys: genome key of every network (numpy int array)
+    num_inputs, num_outputs: (int)
+    networks: views into the file (list of CompiledNetwork)
+    """
+
+    def __init__(self, keys, num_inputs, num_outputs, networks):
+        self.keys = keys
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.networks = networks
+
+    def __len__(self):
+        return len(self.networks)
+
+    def batch(self):
+        """All networks, ready to activate together (FeedForwardBatch)."""
+
+        return FeedForwardBatch(self.num_inputs, self.num_outputs, self.networks)
+
+
+def save_networks(path, networks, num_inputs, num_outputs, keys=None):
+    """
+    Write compiled networks to a network file.
+
+    path: (str)
+    networks: (list of CompiledNetwork)
+    num_inputs, num_outputs: (int)
+    keys: genome key of every network, 0, 1, ... by default (list)
+    """
+
+    count = len(networks)
+    if keys is None:
+        keys = range(count)
+    table = np.array(
+        [
+            (key, net.width, len(net.node_slot), len(net.link_node))
+            for key, net in zip(keys, networks)
+        ],
+        dtype="<i8",
+    ).reshape(count, 4)
+
+    def join(name):
+        if not networks:
+            return np.zeros(0)
+        return np.concatenate([getattr(net, name) for net in networks])
+
+    sections = [
+        np.array([count, num_inputs, num_outputs, 0], dtype="<i8"),
+        table,
+        np.array(
+            [join("node_slot"), join("node_layer"), join("node_activation")],
+            dtype="<i4",
+        ),
+        np.array([join("node_bias"), join("node_response")], dtype="<f8"),
+        np.array([join("link_source"), join("link_node")], dtype="<i4"),
+        np.array(join("link_weight"), dtype="<f8"),
+    ]
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for section in sections:
+            data = section.tobytes()
+            f.write(data)
+            f.write(bytes(_padded(len(data)) - len(data)))
+
+
+def save_genomes(path, genomes, config):
+    """
+    Compile genomes and write their networks to a network file.
+
+    path: (str)
+    genomes: (genome_id, genome) pairs (list)
+    config: NEAT configuration (neat.Config)
+    """
+
+    save_networks(
+        path,
+        [CompiledNetwork.create(g, config) for _, g in genomes],
+        config.genome_config.num_inputs,
+        config.genome_config.num_outputs,
+        [key for key, _ in genomes],
+    )
+
+
+def load_networks(path):
+    """
+    Memory-map a network file.
+
+    path: (str)
+
+    return: (NetworkArchive)
+    """
+
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(data) < 40 or data[:8].tobytes() != MAGIC:
+        raise ValueError("Not a network file: " + path)
+
+    offset = 8
+
+    def section(dtype, shape):
+        nonlocal offset
+        size = int(np.prod(shape))
+        array = np.frombuffer(data, dtype, size, offset).reshape(shape)
+        offset += _padded(array.nbytes)
+        return array
+
+    count, num_inputs, num_outputs, _ = section("<i8", (4,)).tolist()
+    table = section("<i8", (count, 4))
+    nodes = int(table[:, 2].sum())
+    links = int(table[:, 3].sum())
+    size = offset + _padded(12 * nodes) + 16 * nodes + _padded(8 * links) + 8 * links
+    if len(data) < size:
+        raise ValueError("Truncated network file: " + path)
+
+    slot, layer, activation = section("<i4", (3, nodes))
+    bias, response = section("<f8", (2, nodes))
+    source, node = section("<i4", (2, links))
+    weight = section("<f8", (links,))
+
+    node_end = np.cumsum(table[:, 2]).tolist()
+    link_end = np.cumsum(table[:, 3]).tolist()
+    networks = []
+    n0 = l0 = 0
+    for width, n1, l1 in zip(table[:, 1].tolist(), node_end, link_end):
+        networks.append(
+            CompiledNetwork(
+                width,
+                slot[n0:n1],
+                layer[n0:n1],
+                activation[n0:n1],
+                bias[n0:n1],
+                response[n0:n1],
+                source[l0:l1],
+                node[l0:l1],
+                weight[l0:l1],
+            )
+        )
+        n0, l0 = n1, l1
+
+    return NetworkArchive(table[:, 0], num_inputs, num_outputs, networks)
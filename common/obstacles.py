@@ -0,0 +1,159 @@
+"""
+Obstacles of a course in the order they were spawned.
+
+All obstacles of a game scroll at the same speed, so they reach the agents,
+get passed, stop touching the agents and leave the screen in the order they
+were spawned. An ObstacleStream keeps them in a ring buffer with one cursor
+per event instead of scanning every obstacle for every agent each frame:
+
+    reached   obstacles before it can touch an agent
+    cleared   obstacles before it can no longer touch any agent
+    passed    obstacles before it are behind the agents and scored
+
+A cursor only moves forward and stops at the first obstacle its event has
+not happened to yet, so the work per frame grows with the obstacles that
+change state. Collisions only need checking for the obstacles between the
+cleared and reached cursors, see active() and collide().
+"""
+
+import numpy as np
+
+
+class ObstacleStream:
+    """
+    Living obstacles, oldest first.
+
+    capacity: obstacles the buffer holds before it grows (int)
+    """
+
+    def __init__(self, capacity=8):
+        self._slots = [None] * capacity
+        # absolute positions, the slot of position i is i % capacity
+        self._head = 0
+        self._tail = 0
+        self._reached = 0
+        self._cleared = 0
+        self._passed = 0
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def __getitem__(self, i):
+        """
+        Obstacle by age, 0 is the oldest and -1 the newest.
+
+        i: (int)
+
+        return: obstacle
+        """
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("obstacle index out of range")
+        return self._slot(self._head + i)
+
+    def __iter__(self):
+        for i in range(self._head, self._tail):
+            yield self._slot(i)
+
+    def _slot(self, position):
+        return self._slots[position % len(self._slots)]
+
+    def _advance(self, cursor, happened):
+        while cursor < self._tail and happened(self._slot(cursor)):
+            cursor += 1
+        return cursor
+
+    def spawn(self, obstacle):
+        """
+        Add an obstacle behind the newest one.
+
+        obstacle: any object (object)
+        """
+
+        capacity = len(self._slots)
+        if len(self) == capacity:
+            slots = [None] * (2 * capacity)
+            for i in range(self._head, self._tail):
+                slots[i % len(slots)] = self._slot(i)
+            self._slots = slots
+        self._slots[self._tail % len(self._slots)] = obstacle
+        self._tail += 1
+
+    def reach_while(self, reached):
+        """
+        Mark obstacles as within reach of the agents.
+
+        reached: whether an obstacle can touch an agent from now on (callable)
+        """
+
+        self._reached = self._advance(self._reached, reached)
+
+    def clear_while(self, cleared):
+        """
+        Mark obstacles as out of reach of every agent for good.
+
+        cleared: whether an obstacle can no longer touch an agent (callable)
+        """
+
+        self._cleared = self._advance(self._cleared, cleared)
+        self._reached = max(self._reached, self._cleared)
+
+    def pass_while(self, passed):
+        """
+        Mark obstacles as passed by the agents.
+
+        passed: whether the agents are past an obstacle (callable)
+
+        return: number of obstacles passed now (int)
+        """
+
+        start = self._passed
+        self._passed = self._advance(start, passed)
+        return self._passed - start
+
+    def despawn_while(self, gone):
+        """
+        Drop the oldest obstacles once they are off the screen.
+
+        gone: whether an obstacle can be dropped (callable)
+        """
+
+        while self._head < self._tail and gone(self._slot(self._head)):
+            self._slots[self._head % len(self._slots)] = None
+            self._head += 1
+        self._reached = max(self._reached, self._head)
+        self._cleared = max(self._cleared, self._head)
+        self._passed = max(self._passed, self._head)
+
+    def active(self):
+        """
+        Obstacles that may touch an agent, between cleared and reached.
+
+        return: (generator)
+        """
+
+        for i in range(self._cleared, self._reached):
+            yield self._slot(i)
+
+    def collide(self, rows, hits):
+        """
+        Find the agents touching any active obstacle.
+
+        Each obstacle is only checked against the agents no earlier one hit.
+
+        rows: rows of the agents to check (numpy int array)
+        hits: called as hits(obstacle, rows), flags the agents of rows the
+            obstacle touches (callable)
+
+        return: one flag per agent of rows (numpy bool array)
+        """
+
+        hit = np.zeros(len(rows), dtype=bool)
+        for obstacle in self.active():
+            alive = np.flatnonzero(~hit)
+            if not len(alive):
+                break
+            hit[alive[hits(obstacle, rows[alive])]] = True
+        return hit
@@ -0,0 +1,158 @@
+"""
+Where the time of every generation goes, reported while training.
+
+ProfileReporter sets a common.timing.PhaseTimer for the evaluation of each
+generation and prints the seconds per phase (see common.timing.PHASES)
+and the work done after the fitness summary of neat.StdOutReporter. Each
+generation can also be written as one row of a CSV file or one entry of
+a JSON list, picked by the file extension. Without the reporter TIMER
+does nothing, so the games pay a few empty calls per frame.
+
+One generation can be run under a profiler as well, cProfile by default
+or pyinstrument when it is installed. The phases only cover games played
+in this process: with --workers they only show the evaluation as a whole.
+"""
+
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+from time import perf_counter
+
+from neat.reporting import BaseReporter
+
+from common import timing
+
+PROFILERS = ("cprofile", "pyinstrument")
+COLUMNS = (
+    ("generation", "evaluation_seconds")
+    + timing.PHASES
+    + ("other", "steps", "agent_steps", "activations")
+)
+
+
+class ProfileReporter(BaseReporter):
+    """
+    Times the phases of every generation and profiles one of them.
+
+    path: CSV or JSON file to write the timings to, None to only print (str)
+    profile_generation: generation to run under a profiler, None for none (int)
+    profiler: "cprofile" or "pyinstrument" (str)
+    profile_prefix: path of the profile before the generation number (str)
+    """
+
+    def __init__(
+        self,
+        path=None,
+        profile_generation=None,
+        profiler="cprofile",
+        profile_prefix="neat-profile-",
+    ):
+        if path is not None and os.path.splitext(path)[1] not in (".csv", ".json"):
+            raise ValueError("Timings are written to .csv or .json: " + path)
+        if profiler not in PROFILERS:
+            raise ValueError("Unknown profiler: {0!r}".format(profiler))
+
+        self.path = path
+        self.profile_generation = profile_generation
+        self.profiler = profiler
+        self.profile_prefix = profile_prefix
+        self.generations = []
+        self._generation = None
+        self._timer = None
+        self._previous = None
+        self._profile = None
+        self._start = 0.0
+
+        if path is not None and path.endswith(".json") and os.path.exists(path):
+            # a resumed run adds to the timings of the first one
+            with open(path) as f:
+                self.generations = json.load(f)
+
+    def start_generation(self, generation):
+        self._generation = generation
+        self._timer = timing.PhaseTimer()
+        self._previous = timing.TIMER
+        timing.TIMER = self._timer
+
+        if generation == self.profile_generation:
+            self._profile = self._start_profile()
+        self._start = perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        seconds = perf_counter() - self._start
+        timing.TIMER = self._previous
+        if self._profile is not None:
+            self._stop_profile(self._profile)
+            self._profile = None
+
+        timer = self._timer
+        row = {"generation": self._generation, "evaluation_seconds": seconds}
+        row.update(timer.seconds)
+        row["other"] = seconds - sum(timer.seconds.values())
+        row["steps"] = timer.steps
+        row["agent_steps"] = timer.agent_steps
+        row["activations"] = timer.activations
+        self.generations.append(row)
+
+        print(
+            "Phases: "
+            + ", ".join(
+                "{0} {1:.3f}s".format(phase, row[phase])
+                for phase in timing.PHASES + ("other",)
+                if row[phase]
+            )
+        )
+        print(
+            "Evaluation: {0:.3f}s, {1} steps, {2} agent-steps, {3} activations".format(
+                seconds, timer.steps, timer.agent_steps, timer.activations
+            )
+        )
+        if self.path is not None:
+            self._write(row)
+
+    def _write(self, row):
+        if self.path.endswith(".json"):
+            with open(self.path, "w") as f:
+                json.dump(self.generations, f, indent=2)
+            return
+
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, COLUMNS)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def _start_profile(self):
+        print("Profiling generation {0}".format(self._generation))
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError("The pyinstrument profiler is not installed")
+            profile = Profiler()
+            profile.start()
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+        return profile
+
+    def _stop_profile(self, profile):
+        filename = "{0}{1}".format(self.profile_prefix, self._generation)
+        if self.profiler == "pyinstrument":
+            profile.stop()
+            filename += ".html"
+            with open(filename, "w") as f:
+                f.write(profile.output_html())
+            print(profile.output_text())
+        else:
+            profile.disable()
+            filename += ".prof"
+            profile.dump_stats(filename)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(20)
+            print(out.getvalue())
+        print("Saved profile to {0}".format(filename))
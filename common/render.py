@@ -0,0 +1,216 @@
+"""
+Rendering that only touches what changed on screen.
+
+A Renderer stands in for the game window: sprites are blitted on it as
+before, and update() pushes just the rectangles drawn in this frame and the
+previous one to the display. Afterwards it restores the static background
+under everything it drew, so the next frame starts from a clean backdrop
+without redrawing the whole window. HUD labels come from a TextCache, which
+renders a label again only when its text changes. draw_hud() shows the
+usual score, generation and living agents. With large populations
+top_agents picks the few agents worth drawing.
+
+Scrolling backgrounds go through a Parallax: every layer is composited with
+the backdrop once, into a strip long enough to show any scroll offset, and
+each frame copies one window-wide slice of it.
+"""
+
+import numpy as np
+import pygame
+
+
+class Renderer:
+    """
+    Frame drawn on a static background, updated by dirty rectangles.
+
+    win: display surface (pygame Surface)
+    background: static image at (0, 0) behind all sprites, None if a sprite
+        covers the whole window every frame (pygame Surface)
+    """
+
+    # above this many rectangles one bounding box is cheaper to update
+    MAX_RECTS = 200
+
+    def __init__(self, win, background=None):
+        self.win = win
+        self.background = background
+        self._previous = [win.get_rect()]
+        self._current = []
+        self._redrawn = []
+        if background is not None:
+            # in the display's pixel format, restoring it is a plain copy
+            self.background = background.convert()
+            win.blit(self.background, (0, 0))
+
+    def blit(self, source, dest, area=None, clear=True):
+        """
+        Draw on the window, like pygame.Surface.blit.
+
+        clear: restore the background under it after the frame, False for
+            areas that are drawn again every frame (bool)
+
+        return: area drawn (pygame Rect)
+        """
+
+        rect = self.win.blit(source, dest, area)
+        if clear:
+            self._current.append(rect)
+        else:
+            self._redrawn.append(rect)
+        return rect
+
+    def update(self):
+        """Show the frame and clear its sprites off the window."""
+
+        current = self._current
+        if len(current) > self.MAX_RECTS:
+            current = [current[0].unionall(current[1:])]
+        pygame.display.update(self._previous + current + self._redrawn)
+
+        if self.background is not None:
+            for rect in current:
+                self.win.blit(self.background, rect, rect)
+        self._previous = current
+        self._current = []
+        self._redrawn = []
+
+
+class Parallax:
+    """
+    Background layers scrolling at their own speeds over a static backdrop.
+
+    The backdrop must look the same in every column the layers cover (e.g. a
+    vertical gradient), so it can scroll along with them. Rows of a layer
+    that overlap the layer before it keep their transparency and are blended
+    every frame; all other rows are baked into opaque strips.
+
+    backdrop: full-window image (pygame Surface)
+    layers: back to front, objects with img, y and a scroll offset x that may
+        be fractional (list)
+    """
+
+    def __init__(self, backdrop, layers):
+        self.layers = layers
+        window = backdrop.get_width()
+        self._parts = []
+        bottom = 0
+        for layer in layers:
+            width, height = layer.img.get_size()
+            overlap = max(0, min(bottom - layer.y, height))
+            bottom = max(bottom, layer.y + height)
+
+            tiles = -(-(width + window) // width)
+            blended = pygame.Surface((width * tiles, overlap), pygame.SRCALPHA)
+            opaque = pygame.Surface((width * tiles, height - overlap))
+            for x in range(0, width * tiles, window):
+                opaque.blit(backdrop, (x, 0), (0, layer.y + overlap, window, height))
+            for i in range(tiles):
+                blended.blit(layer.img, (i * width, 0))
+                opaque.blit(layer.img, (i * width, -overlap))
+
+            self._parts.append(
+                (
+                    layer,
+                    width,
+                    opaque.convert(),
+                    (0, layer.y + overlap),
+                    pygame.Rect(0, 0, window, height - overlap),
+                )
+            )
+            if overlap:
+                self._parts.append(
+                    (
+                        layer,
+                        width,
+                        blended.convert_alpha(),
+                        (0, layer.y),
+                        pygame.Rect(0, 0, window, overlap),
+                    )
+                )
+
+    def move(self):
+        """Scroll every layer by one frame."""
+
+        for layer in self.layers:
+            layer.move()
+
+    def draw(self, win):
+        """
+        Draw the layers, back to front.
+
+        win: game window (Renderer)
+        """
+
+        for layer, width, strip, dest, area in self._parts:
+            area.x = int(layer.x) % width
+            win.blit(strip, dest, area, clear=False)
+
+
+class TextCache:
+    """
+    Rendered labels, one per slot, redone only when their text changes.
+
+    load_font: returns the font, called on first use (function)
+    color: RGB (tuple)
+    """
+
+    def __init__(self, load_font, color=(255, 255, 255)):
+        self.load_font = load_font
+        self.color = color
+        self.font = None
+        self._labels = {}
+
+    def render(self, slot, text):
+        """
+        Render the text of a label.
+
+        slot: name of the label, e.g. "score" (str)
+        text: (str)
+
+        return: (pygame Surface)
+        """
+
+        label = self._labels.get(slot)
+        if label is None or label[0] != text:
+            if self.font is None:
+                self.font = self.load_font()
+            label = (text, self.font.render(text, 1, self.color))
+            self._labels[slot] = label
+        return label[1]
+
+
+def draw_hud(win, text, width, score, gen, alive):
+    """
+    Draw the score in the top right, generation and living agents in the top left.
+
+    win: game window (Renderer)
+    text: labels in the font of the game (TextCache)
+    width: window width px (int)
+    score: (int)
+    gen: number of generation (int)
+    alive: living agents (int)
+    """
+
+    text_score = text.render("score", "Score: " + str(score))
+    win.blit(text_score, (width - 10 - text_score.get_width(), 10))
+
+    text_gen = text.render("gen", "Gen: " + str(gen))
+    win.blit(text_gen, (10, 10))
+
+    text_alive = text.render("alive", "Alive: " + str(alive))
+    win.blit(text_alive, (10, 50))
+
+
+def top_agents(agents, n=None):
+    """
+    Pick the fittest living agents, to draw only a sample of a population.
+
+    agents: (common.agents.Agents)
+    n: number of agents, None for all (int)
+
+    return: positions into agents.rows (numpy int array)
+    """
+
+    if n is None or len(agents) <= n:
+        return np.arange(len(agents))
+    return np.argpartition(agents.fitness[agents.rows], -n)[-n:]
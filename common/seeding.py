@@ -0,0 +1,58 @@
+"""
+Seeds for reproducible obstacle courses.
+
+A run has one seed. Every generation gets its own course seed derived from
+it, stored on the NEAT config as ``course_seed`` so it reaches evaluations
+in other processes together with the config. Each evaluation builds its
+obstacles from a private random.Random seeded with that value, so all
+genomes of a generation face the same course and re-evaluating a genome
+reproduces its run exactly. A fixed course keeps the seed of the first
+generation for the whole run, so unchanged genomes score the same in every
+generation and their fitness can be cached. With several courses per
+generation (see common.courses) each of them gets a seed of its own, listed
+in ``course_seeds``.
+"""
+
+import random
+
+from neat.reporting import BaseReporter
+
+
+def generation_seed(seed, generation, course=0):
+    """
+    Derive the course seed of one generation.
+
+    seed: seed of the whole run (int)
+    generation: (int)
+    course: index of the course within the generation (int)
+
+    return: (int)
+    """
+
+    if course:
+        return random.Random("{}-{}-{}".format(seed, generation, course)).getrandbits(
+            32
+        )
+    return random.Random("{}-{}".format(seed, generation)).getrandbits(32)
+
+
+class CourseSeeder(BaseReporter):
+    """
+    Sets config.course_seed and course_seeds at the start of every generation.
+
+    fixed: use the course of generation 0 for every generation (bool)
+    """
+
+    def __init__(self, config, seed, fixed=False):
+        self.config = config
+        self.seed = seed
+        self.fixed = fixed
+
+    def start_generation(self, generation):
+        if self.fixed:
+            generation = 0
+        self.config.course_seeds = [
+            generation_seed(self.seed, generation, course)
+            for course in range(getattr(self.config, "courses", 1))
+        ]
+        self.config.course_seed = self.config.course_seeds[0]
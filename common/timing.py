@@ -0,0 +1,74 @@
+"""
+Where the time of a game goes, frame by frame.
+
+common.environment.play() and the step() of every game split each frame
+into phases with lap() calls on TIMER, and time building the networks
+before the first frame. Normally that is a timer doing nothing;
+benchmark.py and common.profiling.ProfileReporter set a PhaseTimer to add
+up the seconds spent in each phase and count the work done.
+"""
+
+from time import perf_counter
+
+PHASES = ("networks", "physics", "collision", "obstacles", "inference", "render")
+
+
+class PhaseTimer:
+    """
+    Seconds per phase and work counters of the frames timed so far.
+
+    seconds: time spent per phase (dict)
+    steps: frames simulated (int)
+    agent_steps: living agents summed over frames (int)
+    activations: network activations (int)
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.steps = 0
+        self.agent_steps = 0
+        self.activations = 0
+        self._last = 0.0
+
+    def start(self, agents):
+        """
+        Start timing a frame.
+
+        agents: living agents in this frame (int)
+        """
+
+        self.steps += 1
+        self.agent_steps += agents
+        self._last = perf_counter()
+
+    def mark(self):
+        """Start timing outside a frame, e.g. the setup of a game."""
+
+        self._last = perf_counter()
+
+    def lap(self, phase, activations=0):
+        """
+        Add the time since the last start / lap to a phase.
+
+        phase: one of PHASES (str)
+        activations: networks activated in this lap (int)
+        """
+
+        now = perf_counter()
+        self.seconds[phase] += now - self._last
+        self._last = now
+        self.activations += activations
+
+
+class _NullTimer:
+    def start(self, agents):
+        pass
+
+    def mark(self):
+        pass
+
+    def lap(self, phase, activations=0):
+        pass
+
+
+TIMER = _NullTimer()
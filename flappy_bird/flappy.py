@@ -1,166 +1,183 @@
 # Project created with help of tutorial: https://github.com/techwithtim/NEAT-Flappy-Bird
 import os
 import random
-import time
+import sys
 
-import neat
+import numpy as np
 import pygame
 
-pygame.font.init()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common import collision, timing  # noqa: E402
+from common.assets import Assets  # noqa: E402
+from common.atlas import RotationAtlas  # noqa: E402
+from common.driver import Driver, argument_parser, profile_reporter  # noqa: E402
+from common.environment import Environment  # noqa: E402
+from common.obstacles import ObstacleStream  # noqa: E402
+from common.render import Renderer, TextCache, draw_hud  # noqa: E402
 
 WIN_WIDTH = 500
 WIN_HEIGHT = 800
-gen_score = 0
 
-BIRD_IMG = [
-    pygame.transform.scale2x(
-        pygame.image.load(
-            os.path.join(os.path.dirname(__file__), "images", "bird1.png")
-        )
-    ),
-    pygame.transform.scale2x(
-        pygame.image.load(
-            os.path.join(os.path.dirname(__file__), "images", "bird2.png")
-        )
-    ),
-    pygame.transform.scale2x(
-        pygame.image.load(
-            os.path.join(os.path.dirname(__file__), "images", "bird3.png")
-        )
-    ),
-]
-
-PIPE_IMG = pygame.transform.scale2x(
-    pygame.image.load(os.path.join(os.path.dirname(__file__), "images", "pipe.png"))
-)
-BASE_IMG = pygame.transform.scale2x(
-    pygame.image.load(os.path.join(os.path.dirname(__file__), "images", "base.png"))
-)
-BG_IMG = pygame.transform.scale2x(
-    pygame.image.load(os.path.join(os.path.dirname(__file__), "images", "bg.png"))
-)
-
-STAT_FONT = pygame.font.SysFont("comicsans", 50)
-
-
-class Bird:
-    IMG = BIRD_IMG
+# size and opaque box (x, y, w, h) of every sprite, from ASSETS.table()
+SPRITES = {
+    "bird1": (68, 48, (0, 0, 68, 48)),
+    "bird2": (68, 48, (0, 0, 68, 48)),
+    "bird3": (68, 48, (0, 0, 68, 48)),
+    "pipe": (104, 640, (0, 0, 104, 640)),
+    "pipe_top": (104, 640, (0, 0, 104, 640)),
+    "base": (672, 224, (0, 0, 672, 224)),
+    "bg": (576, 1024, (0, 0, 576, 1024)),
+}
+
+ASSETS = Assets(os.path.join(os.path.dirname(__file__), "images"), SPRITES)
+ASSETS.add("bird1", "bird1.png", scale2x=True)
+ASSETS.add("bird2", "bird2.png", scale2x=True)
+ASSETS.add("bird3", "bird3.png", scale2x=True)
+ASSETS.add("pipe", "pipe.png", scale2x=True)
+ASSETS.add("pipe_top", lambda: pygame.transform.flip(ASSETS["pipe"], False, True))
+ASSETS.add("base", "base.png", scale2x=True)
+ASSETS.add("bg", "bg.png", scale2x=True)
+BIRD_FRAMES = ["bird1", "bird2", "bird3"]
+
+HUD_TEXT = TextCache(lambda: ASSETS.font("comicsans", 50))
+
+
+class Flock:
+    """All birds of a generation, one array row per bird."""
+
+    HEIGHT = SPRITES["bird1"][1]
     MAX_ROTATION = 25
     ROT_VEL = 20
     ANIMATION_TIME = 5
+    # tilt falls by ROT_VEL from 0 or MAX_ROTATION until it is below -90
+    ATLAS = RotationAtlas(
+        lambda: [ASSETS[name] for name in BIRD_FRAMES],
+        [*range(0, -110, -20), *range(25, -110, -20)],
+    )
 
-    def __init__(self, x, y):
+    def __init__(self, size, x, y):
+        self.shapes = [ASSETS.shape(name) for name in BIRD_FRAMES]
         self.x = x
-        self.y = y
-        self.tilt = 0
-        self.tick_count = 0
-        self.vel = 0
-        self.height = self.y
-        self.img_count = 0
-        self.img = self.IMG[0]
-
-    def jump(self):
-        self.vel = -10.5
-        self.tick_count = 0
-        self.height = self.y
-
-    def move(self):
-        self.tick_count += 1
-        d = self.vel * self.tick_count + 1.5 * self.tick_count ** 2
+        self.y = np.full(size, y, dtype=float)
+        self.tilt = np.zeros(size, dtype=int)
+        self.tick_count = np.zeros(size, dtype=int)
+        self.vel = np.zeros(size)
+        self.height = self.y.copy()
+        self.img_count = np.zeros(size, dtype=int)
+        self.frame = np.zeros(size, dtype=int)
+
+    def jump(self, rows):
+        self.vel[rows] = -10.5
+        self.tick_count[rows] = 0
+        self.height[rows] = self.y[rows]
+
+    def move(self, rows):
+        tick_count = self.tick_count[rows] + 1
+        d = self.vel[rows] * tick_count + 1.5 * tick_count ** 2
+        d = np.minimum(d, 16)
+        d[d < 0] -= 2
+
+        y = self.y[rows] + d
+
+        tilt = self.tilt[rows]
+        rising = (d < 0) | (y < self.height[rows] + 50)
+        tilt[rising & (tilt < self.MAX_ROTATION)] = self.MAX_ROTATION
+        tilt[~rising & (tilt > -90)] -= self.ROT_VEL
+
+        self.tick_count[rows] = tick_count
+        self.y[rows] = y
+        self.tilt[rows] = tilt
+
+    def animate(self, rows):
+        t = self.ANIMATION_TIME
+        count = self.img_count[rows] + 1
+
+        frame = np.select(
+            [
+                count < t,
+                count < t * 2,
+                count < t * 3,
+                count < t * 4,
+                count == t * 4 + 1,
+            ],
+            [0, 1, 2, 1, 0],
+            self.frame[rows],
+        )
+        count[count == t * 4 + 1] = 0
 
-        if d >= 16:
-            d = 16
+        diving = self.tilt[rows] <= -80
+        frame[diving] = 1
+        count[diving] = t * 2
 
-        if d < 0:
-            d -= 2
+        self.img_count[rows] = count
+        self.frame[rows] = frame
 
-        self.y = self.y + d
+    def inputs(self, rows, pipe):
+        y = self.y[rows]
+        return np.column_stack((y, np.abs(y - pipe.height), np.abs(y - pipe.bottom)))
 
-        if d < 0 or self.y < self.height + 50:
-            if self.tilt < self.MAX_ROTATION:
-                self.tilt = self.MAX_ROTATION
-        else:
-            if self.tilt > -90:
-                self.tilt -= self.ROT_VEL
-
-    def draw(self, win):
-        self.img_count += 1
-
-        if self.img_count < self.ANIMATION_TIME:
-            self.img = self.IMG[0]
-        elif self.img_count < self.ANIMATION_TIME * 2:
-            self.img = self.IMG[1]
-        elif self.img_count < self.ANIMATION_TIME * 3:
-            self.img = self.IMG[2]
-        elif self.img_count < self.ANIMATION_TIME * 4:
-            self.img = self.IMG[1]
-        elif self.img_count == self.ANIMATION_TIME * 4 + 1:
-            self.img = self.IMG[0]
-            self.img_count = 0
-
-        if self.tilt <= -80:
-            self.img = self.IMG[1]
-            self.img_count = self.ANIMATION_TIME * 2
-
-        rotated_image = pygame.transform.rotate(self.img, self.tilt)
-        new_rect = rotated_image.get_rect(
-            center=self.img.get_rect(topleft=(self.x, self.y)).center
-        )
-        win.blit(rotated_image, new_rect.topleft)
-
-    def get_mask(self):
-        return pygame.mask.from_surface(self.img)
+    def draw(self, win, rows):
+        for frame, tilt, y in zip(
+            self.frame[rows].tolist(), self.tilt[rows].tolist(), self.y[rows].tolist()
+        ):
+            self.ATLAS.blit(win, frame, tilt, (self.x, y))
 
 
 class Pipe:
     GAP = 200
     VEL = 5
+    WIDTH, HEIGHT = SPRITES["pipe"][:2]
 
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
+        self.top_shape = ASSETS.shape("pipe_top")
+        self.bottom_shape = ASSETS.shape("pipe")
         self.x = x
         self.height = 0
 
         self.top = 0
         self.bottom = 0
-        self.PIPE_TOP = pygame.transform.flip(PIPE_IMG, False, True)
-        self.PIPE_BOTTOM = PIPE_IMG
 
-        self.passed = False
-        self.set_height()
+        self.set_height(rng)
 
-    def set_height(self):
-        self.height = random.randrange(50, 450)
-        self.top = self.height - self.PIPE_TOP.get_height()
+    def set_height(self, rng=random):
+        self.height = rng.randrange(50, 450)
+        self.top = self.height - self.HEIGHT
         self.bottom = self.height + self.GAP
 
     def move(self):
         self.x -= self.VEL
 
     def draw(self, win):
-        win.blit(self.PIPE_TOP, (self.x, self.top))
-        win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
-
-    def collide(self, bird):
-        bird_mask = bird.get_mask()
-        top_mask = pygame.mask.from_surface(self.PIPE_TOP)
-        bottom_mask = pygame.mask.from_surface(self.PIPE_BOTTOM)
-
-        top_offset = (self.x - bird.x, self.top - round(bird.y))
-        bottom_offset = (self.x - bird.x, self.bottom - round(bird.y))
-
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-        t_point = bird_mask.overlap(top_mask, top_offset)
-
-        if t_point or b_point:
-            return True
+        win.blit(ASSETS["pipe_top"], (self.x, self.top))
+        win.blit(ASSETS["pipe"], (self.x, self.bottom))
+
+    def collide(self, flock, rows):
+        hit = np.zeros(len(rows), dtype=bool)
+        if not -self.WIDTH < self.x - flock.x < flock.shapes[0].width:
+            return hit
+
+        y = np.round(flock.y[rows]).astype(int)
+        frames = flock.frame[rows]
+
+        for frame, bird_shape in enumerate(flock.shapes):
+            birds = frames == frame
+            for pipe_shape, pipe_y in (
+                (self.top_shape, self.top),
+                (self.bottom_shape, self.bottom),
+            ):
+                lowest, hits = collision.vertical_hits(
+                    bird_shape, pipe_shape, self.x - flock.x
+                )
+                i = pipe_y - y[birds] - lowest
+                inside = (i >= 0) & (i < len(hits))
+                hit[birds] |= inside & hits[np.clip(i, 0, len(hits) - 1)]
 
-        return False
+        return hit
 
 
 class Base:
     VEL = 5
-    WIDTH = BASE_IMG.get_width()
-    IMG = BASE_IMG
+    WIDTH = SPRITES["base"][0]
 
     def __init__(self, y):
         self.y = y
@@ -178,146 +195,125 @@ class Base:
             self.x2 = self.x1 + self.WIDTH
 
     def draw(self, win):
-        win.blit(self.IMG, (self.x1, self.y))
-        win.blit(self.IMG, (self.x2, self.y))
-
-
-def draw_window(win, birds, pipes, base, score, gen_score, alive_score):
-    win.blit(BG_IMG, (0, 0))
-
-    for pipe in pipes:
-        pipe.draw(win)
-
-    text_score = STAT_FONT.render("Score: " + str(score), 1, (255, 255, 255))
-    win.blit(text_score, (WIN_WIDTH - 10 - text_score.get_width(), 10))
-
-    text_gen = STAT_FONT.render("Gen: " + str(gen_score), 1, (255, 255, 255))
-    win.blit(text_gen, (10, 10))
-
-    text_alive = STAT_FONT.render("Alive: " + str(alive_score), 1, (255, 255, 255))
-    win.blit(text_alive, (10, 50))
-
-    base.draw(win)
-    for bird in birds:
-        bird.draw(win)
-    pygame.display.update()
-
-
-def main(genomes, config):
-    global gen_score
-    gen_score += 1
-    nets = []
-    ge = []
-    birds = []
-
-    for _, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        birds.append(Bird(230, 350))
-        g.fitness = 0
-        ge.append(g)
-
-    base = Base(730)
-    pipes = [Pipe(600)]
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
-    clock = pygame.time.Clock()
-
-    score = 0
-
-    run = True
-
-    while run:
-        clock.tick(30)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-
+        win.blit(ASSETS["base"], (self.x1, self.y))
+        win.blit(ASSETS["base"], (self.x2, self.y))
+
+
+class FlappyGame(Environment):
+    """Birds flying through the pipes, one row per bird."""
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.flock = None
+        self.pipes = None
+        self.base = None
+        self.rng = None
+        self.win = None
+
+    def reset(self, seed):
+        self.rng = random.Random(seed)
+        self.flock = Flock(self.size, 230, 350)
+        self.base = Base(730)
+        self.pipes = ObstacleStream()
+        self.pipes.spawn(Pipe(600, self.rng))
+        self.score = 0
+        # birds fall before they look, see step()
+        self.flock.move(np.arange(self.size))
+
+    def observe(self, rows):
+        pipes = self.pipes
         pipe_ind = 0
-        if len(birds) > 0:
-            if (
-                len(pipes) > 1
-                and birds[0].x > pipes[0].x + pipes[0].PIPE_TOP.get_width()
-            ):
-                pipe_ind = 1
-        else:
-            run = False
-            break
-
-        for x, bird in enumerate(birds):
-            bird.move()
-            ge[x].fitness += 0.1
-
-            output = nets[x].activate(
-                (
-                    bird.y,
-                    abs(bird.y - pipes[pipe_ind].height),
-                    abs(bird.y - pipes[pipe_ind].bottom),
-                )
-            )
-
-            if output[0] > 0.5:
-                bird.jump()
-
-        add_pipe = False
-        rem = []
+        if len(pipes) > 1 and self.flock.x > pipes[0].x + pipes[0].WIDTH:
+            pipe_ind = 1
+        return self.flock.inputs(rows, pipes[pipe_ind])
+
+    def step(self, rows, actions):
+        timer = timing.TIMER
+        flock = self.flock
+        pipes = self.pipes
+        flock.jump(rows[actions[:, 0] > 0.5])
+        timer.lap("physics")
+
+        bird_width = flock.shapes[0].width
+        pipes.reach_while(lambda pipe: pipe.x - flock.x < bird_width)
+        pipes.clear_while(lambda pipe: pipe.x - flock.x <= -pipe.WIDTH)
+        dones = pipes.collide(rows, lambda pipe, rows: pipe.collide(flock, rows))
+        rewards = np.where(dones, -1.0, 0.0)
+        timer.lap("collision")
+
+        add_pipe = not dones.all() and pipes.pass_while(lambda pipe: pipe.x < flock.x)
+        pipes.despawn_while(lambda pipe: pipe.x + pipe.WIDTH < 0)
         for pipe in pipes:
-            for x, bird in enumerate(birds):
-                if pipe.collide(bird):
-                    ge[x].fitness -= 1
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
-
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True
-                    add_pipe = True
-
-            if pipe.x + pipe.PIPE_TOP.get_width() < 0:
-                rem.append(pipe)
-
             pipe.move()
 
         if add_pipe:
-            score += 1
-            for g in ge:
-                g.fitness += 5
-            pipes.append(Pipe(500))
-
-        for r in rem:
-            pipes.remove(r)
-
-        for x, bird in enumerate(birds):
-            if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
-
-        base.move()
-        alive_score = len(birds)
-        draw_window(win, birds, pipes, base, score, gen_score, alive_score)
-
-
-def run(config_path):
-    config = neat.config.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
-        config_path,
-    )
-
-    p = neat.Population(config)
-
-    p.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
-    p.add_reporter(stats)
+            self.score += 1
+            rewards[~dones] += 5
+            pipes.spawn(Pipe(500, self.rng))
+        timer.lap("obstacles")
+
+        y = flock.y[rows]
+        dones |= (y + flock.HEIGHT >= 730) | (y < 0)
+        timer.lap("collision")
+
+        self.base.move()
+        rows = rows[~dones]
+        flock.animate(rows)
+        flock.move(rows)
+        timer.lap("physics")
+        return rewards, dones
+
+    def open(self):
+        self.win = Renderer(
+            pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)), ASSETS["bg"]
+        )
 
-    winner = p.run(main, 50)
+    def render(self, rows, gen, alive):
+        win = self.win
+        for pipe in self.pipes:
+            pipe.draw(win)
+        draw_hud(win, HUD_TEXT, WIN_WIDTH, self.score, gen, alive)
+        self.base.draw(win)
+        self.flock.draw(win, rows)
+        win.update()
+
+
+DRIVER = Driver(FlappyGame, "flappy", 50)
+play = DRIVER.play
+main = DRIVER.evaluate
+eval_genome = DRIVER.eval_genome
+
+
+def run(
+    config_path,
+    headless_mode=False,
+    workers=1,
+    seed=None,
+    fixed_course=False,
+    cache_path=None,
+    resume=None,
+    profile=None,
+):
+    """Train new networks, see common.driver.Driver.run."""
+
+    DRIVER.headless = headless_mode
+    return DRIVER.run(
+        config_path, workers, seed, fixed_course, cache_path, resume, profile
+    )
 
 
 if __name__ == "__main__":
+    args = argument_parser().parse_args()
+    DRIVER.configure(args)
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config-flappybird.txt")
-    run(config_path)
+    DRIVER.run(
+        config_path,
+        args.workers,
+        args.seed,
+        args.fixed_course,
+        args.fitness_cache,
+        args.resume,
+        profile_reporter(args, "flappy-profile-"),
+    )
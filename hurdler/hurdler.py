@@ -1,149 +1,159 @@
 """Neural Network (NEAT) learns to play hurdler-game."""
 
 import os
-import pickle
 import random
+import sys
 
-import neat
+import numpy as np
 import pygame
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common import collision, timing  # noqa: E402
+from common.assets import Assets  # noqa: E402
+from common.driver import (  # noqa: E402
+    Driver,
+    argument_parser,
+    load_config,
+    profile_reporter,
+)
+from common.environment import Environment  # noqa: E402
+from common.obstacles import ObstacleStream  # noqa: E402
+from common.render import Parallax, Renderer, TextCache, draw_hud  # noqa: E402
+from jumps import GROUND_Y, jump_tables, load_jumps  # noqa: E402
 
 WIN_WIDTH = 1200
 WIN_HEIGHT = 600
 VELOCITY = 10
-GEN_SCORE = 0
-
-pygame.font.init()
-STAT_FONT = pygame.font.SysFont("consolas", 30)
-
-local_dir = os.path.dirname(__file__)
-runner_img = [
-    pygame.image.load(os.path.join(local_dir, "images", f"run_{i}.png"))
-    for i in range(9)
-]
-bg_img = pygame.image.load(os.path.join(local_dir, "images", "bg.png"))
-sky_img = pygame.image.load(os.path.join(local_dir, "images", "sky_m.png"))
-bleachers_img = pygame.image.load(os.path.join(local_dir, "images", "bleachers_m.png"))
-track_img = pygame.image.load(os.path.join(local_dir, "images", "track_m.png"))
-hurdle_img = [
-    pygame.image.load(os.path.join(local_dir, "images", f"hurdle_{i}.png"))
-    for i in ["high", "low", "long", "short"]
-]
-
-
-class Runner:
-    """A representation of a runner that is controlled by the AI / player."""
-
-    def __init__(self, x, y):
+
+# size and opaque box (x, y, w, h) of every sprite, from ASSETS.table()
+SPRITES = {
+    "run_0": (100, 121, (15, 9, 64, 105)),
+    "run_1": (100, 121, (10, 9, 69, 101)),
+    "run_2": (100, 121, (10, 8, 77, 94)),
+    "run_3": (100, 121, (13, 9, 74, 102)),
+    "run_4": (100, 121, (18, 10, 68, 102)),
+    "run_5": (100, 121, (24, 10, 57, 106)),
+    "run_6": (100, 121, (30, 10, 46, 111)),
+    "run_7": (100, 121, (32, 10, 46, 111)),
+    "run_8": (100, 121, (27, 10, 54, 109)),
+    "hurdle_high": (15, 225, (0, 0, 15, 225)),
+    "hurdle_low": (15, 75, (0, 0, 15, 75)),
+    "hurdle_long": (400, 25, (0, 0, 400, 25)),
+    "hurdle_short": (5, 25, (0, 0, 5, 25)),
+    "bg": (1200, 600, (0, 0, 1200, 600)),
+    "sky_m": (1200, 129, (171, 10, 767, 88)),
+    "bleachers_m": (1200, 169, (0, 3, 1199, 163)),
+    "track_m": (1200, 134, (0, 1, 1200, 133)),
+}
+
+ASSETS = Assets(os.path.join(os.path.dirname(__file__), "images"), SPRITES)
+for name in SPRITES:
+    ASSETS.add(name, name + ".png")
+RUNNER_FRAMES = ["run_{0}".format(i) for i in range(9)]
+HURDLES = ["hurdle_high", "hurdle_low", "hurdle_long", "hurdle_short"]
+
+HUD_TEXT = TextCache(lambda: ASSETS.font("consolas", 30))
+
+# one jump type per network output, in order; see parabola.py to fit new ones
+JUMPS = load_jumps(os.path.join(os.path.dirname(__file__), "jump_config.json"))
+
+
+class Pack:
+    """
+    All runners of a generation, one array row per runner.
+
+    Every runner runs at the same x. A runner in the air only counts ticks:
+    its height is looked up in the baked dy table of its jump type (see
+    jumps.py). Jump type len(JUMPS) is running on the ground, so that row of
+    the tables has no airtime.
+
+    x: coord px, shared (int)
+    y0: coord px of the ground (int)
+    jump: jump type of every runner (numpy int array)
+    t: ticks since take-off (numpy int array)
+    y: coord px (numpy int array)
+    frame: animation frame shown (numpy int array)
+    img_index: animation frame while running (numpy int array)
+    """
+
+    GROUNDED = len(JUMPS)
+    AIRTIME, FRAME, DY = jump_tables(JUMPS)
+
+    def __init__(self, size, x, y):
         """
-        Create a runner.
+        Create the runners of a generation, on the ground.
 
+        size: number of runners (int)
         x: position x (int)
         y: position y (int)
 
         return: None
         """
 
+        self.shapes = [ASSETS.shape(name) for name in RUNNER_FRAMES]
         self.x = x
-        self.y = y
-        self.img = runner_img[0]
-        self.img_index = 0
         self.y0 = y
+        self.y = np.full(size, y, dtype=int)
+        self.jump = np.full(size, self.GROUNDED, dtype=int)
+        self.t = np.zeros(size, dtype=int)
+        self.frame = np.zeros(size, dtype=int)
+        self.img_index = np.zeros(size, dtype=int)
 
-        self.jump = False
-        self.a = 0
-        self.b = 0
-        self.c = 0
-        self.t = 0
-
-    def draw(self, win):
+    def draw(self, win, rows):
         """
-        Show runner on screen.
+        Show runners on screen.
 
         win: game window (pygame Surface / Window)
+        rows: runners to draw (numpy int array)
 
         return: None
         """
 
-        win.blit(self.img, (self.x, self.y))
+        for frame, y in zip(self.frame[rows].tolist(), self.y[rows].tolist()):
+            win.blit(ASSETS[RUNNER_FRAMES[frame]], (self.x, y))
 
-    def move(self):
+    def move(self, rows):
         """
-        Change y coord according to jump function.
+        Advance the jumps in progress by one tick, the other runners run.
+
+        rows: runners to move (numpy int array)
 
         return: None
         """
-        if self.y < self.y0 or self.jump:
-            self.jump = False
-            self.t += 1
-            displacement = -self.a * self.t ** 2 - self.b * self.t - self.c
-            self.y = displacement + self.y0
 
-        else:
-            self.y = self.y0
-            self.t = 0
-            if self.img_index == 8:
-                self.img_index = 0
-            else:
-                self.img_index += 1
+        jump = self.jump[rows]
+        t = self.t[rows] + 1
+        running = t > self.AIRTIME[jump]
+        jump[running] = self.GROUNDED
+        t[running] = 0
 
-            self.img = runner_img[self.img_index]
+        img_index = self.img_index[rows]
+        img_index[running] = (img_index[running] + 1) % len(RUNNER_FRAMES)
+        frame = self.frame[rows]
+        frame[running] = img_index[running]
 
-    def high_jump(self):
-        """
-        airtime: 47
-        max_height: 250
-        """
-        if not self.jump and self.y == self.y0:
-            self.jump = True
-            self.img = runner_img[8]
-            self.a = -0.46
-            self.b = 21.5
-            self.c = 0.1
-
-    def long_jump(self):
-        """
-        airtime: 67
-        max_height: 50
-        """
-        if not self.jump and self.y == self.y0:
-            self.jump = True
-            self.img = runner_img[2]
-            self.a = -0.045
-            self.b = 3.0
-            self.c = 0.0
-
-    def low_jump(self):
-        """
-        airtime: 30
-        max_height: 100
-        """
-        if not self.jump and self.y == self.y0:
-            self.jump = True
-            self.img = runner_img[0]
-            self.a = -0.48074986
-            self.b = 14.4224957
-            self.c = -8.16871777
-
-    def short_jump(self):
-        """
-        airtime: 17
-        max_height: 50
-        """
-        if not self.jump and self.y == self.y0:
-            self.jump = True
-            self.img = runner_img[5]
-            self.a = -0.60570686
-            self.b = 9.08560296
-            self.c = 15.92898888
-
-    def get_mask(self):
+        self.jump[rows] = jump
+        self.t[rows] = t
+        self.y[rows] = self.y0 + self.DY[jump, t]
+        self.img_index[rows] = img_index
+        self.frame[rows] = frame
+
+    def start_jump(self, rows, choice):
         """
-        Convert image to zero-one matrix.
+        Take off on the next move, unless already in the air.
+
+        rows: runners that chose (numpy int array)
+        choice: jump type of every runner, len(JUMPS) and up to keep
+            running (numpy int array)
 
-        return: (pygame Mask)
+        return: None
         """
-        return pygame.mask.from_surface(self.img)
+
+        jumping = (choice < self.GROUNDED) & (self.jump[rows] == self.GROUNDED)
+        rows = rows[jumping]
+        choice = choice[jumping]
+        self.jump[rows] = choice
+        self.frame[rows] = self.FRAME[choice]
 
 
 class Hurdle:
@@ -151,14 +161,15 @@ class Hurdle:
     Create obstacle for runners.
     x: coord px (int)
     y: coord px (int)
+    rng: source of the hurdle type (random.Random)
     """
 
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random):
         # ["high", "low", "long", "short"]
-        idx = random.randint(0, 3)
-        self.img = hurdle_img[idx]
-        self.width = self.img.get_width()
-        self.height = self.img.get_height()
+        idx = rng.randint(0, 3)
+        self.sprite = HURDLES[idx]
+        self.shape = ASSETS.shape(self.sprite)
+        self.width, self.height = ASSETS.size(self.sprite)
 
         if idx == 0:
             offset = 230
@@ -171,7 +182,6 @@ class Hurdle:
 
         self.offset_front = offset
         self.offset_back = offset
-        self.passed = False
 
         self.x = x + self.offset_front
         self.y = y - self.height
@@ -192,75 +202,58 @@ class Hurdle:
 
         return: None
         """
-        win.blit(self.img, (self.x, self.y))
+        win.blit(ASSETS[self.sprite], (self.x, self.y))
 
-    def get_mask(self):
+    def collide(self, pack, rows):
         """
-        Convert image to zero-one matrix.
+        Check which runners overlap the hurdle, pixel by pixel.
 
-        return: (pygame Mask)
-        """
-
-        return pygame.mask.from_surface(self.img)
+        pack: (Pack)
+        rows: runners to check (numpy int array)
 
-    def collision(self, runner):
+        return: one flag per runner (numpy bool array)
         """
-        Check if pixels in two images are overlapping.
 
-        return: Bool
-        """
-        runner_mask = runner.get_mask()
-        hurlde_mask = self.get_mask()
+        hit = np.zeros(len(rows), dtype=bool)
+        y = pack.y[rows]
+        frames = pack.frame[rows]
 
-        return runner_mask.overlap(
-            hurlde_mask, (self.x - runner.x, self.y - round(runner.y))
-        )
+        for frame in np.unique(frames).tolist():
+            runners = frames == frame
+            lowest, hits = collision.vertical_hits(
+                pack.shapes[frame], self.shape, self.x - pack.x
+            )
+            i = self.y - y[runners] - lowest
+            inside = (i >= 0) & (i < len(hits))
+            hit[runners] = inside & hits[np.clip(i, 0, len(hits) - 1)]
+
+        return hit
 
 
 class Background:
     """
-    Moving background.
+    Moving background, drawn by a common.render.Parallax.
 
-    x1: image_1 coord #px (int)
-    x2: image_2 coord #px (int)
+    x: scroll offset #px, fractional for slow layers (float)
     y: coord #px (int)
-    v_x: x-axis velocity #px (int)
+    v_x: x-axis velocity #px (float)
     img: (pygame Surface)
     width: #px (int)
     """
 
     def __init__(self, y):
-        self.x1 = 0
-        self.x2 = WIN_WIDTH
+        self.x = 0.0
         self.y = y
         self.v_x = VELOCITY
-        self.img = bg_img
-        self.width = bg_img.get_width()
+        self.img = ASSETS["bg"]
+        self.width = self.img.get_width()
 
     def move(self):
         """
-        Move two of the same images simultaneously in a loop.
-        """
-
-        self.x1 -= self.v_x
-        self.x2 -= self.v_x
-
-        if self.x1 + self.width < 0:
-            self.x1 = self.x2 + self.width
-
-        if self.x2 + self.width < 0:
-            self.x2 = self.x1 + self.width
-
-    def draw(self, win):
+        Scroll the image to the left in a loop.
         """
-        Shows image on game window.
-
-        win: game window (pygame Surface / Window)
 
-        return: None
-        """
-        win.blit(self.img, (self.x1, self.y))
-        win.blit(self.img, (self.x2, self.y))
+        self.x = (self.x + self.v_x) % self.width
 
 
 class Track(Background):
@@ -275,8 +268,8 @@ class Track(Background):
     def __init__(self, y):
         super().__init__(y)
         self.v_x = VELOCITY
-        self.img = track_img
-        self.width = track_img.get_width()
+        self.img = ASSETS["track_m"]
+        self.width = self.img.get_width()
 
 
 class Bleachers(Background):
@@ -291,8 +284,8 @@ class Bleachers(Background):
     def __init__(self, y):
         super().__init__(y)
         self.v_x = 1
-        self.img = bleachers_img
-        self.width = bleachers_img.get_width()
+        self.img = ASSETS["bleachers_m"]
+        self.width = self.img.get_width()
 
 
 class Sky(Background):
@@ -307,228 +300,232 @@ class Sky(Background):
     def __init__(self, y):
         super().__init__(y)
         self.v_x = 0.5
-        self.img = sky_img
-        self.width = sky_img.get_width()
-
-
-def draw_window(
-    win,
-    runners,
-    hurdles,
-    score,
-    gen_score,
-    alive_score,
-    track_m=None,
-    bleachers_m=None,
-    sky_m=None,
-):
-    """
-    Draw all sprites on screen and update view.
-
-    win: game window (pygame Surface / Window)
-    runners: Runner objects (list)
-    hurdles: Hurdle objects (list)
-    score: (int)
-    gen_score: number of generation (int)
-    alive_score: alive genomes (int)
-    track_m: moving bottom background (pygame Surface)
-    bleachers_m: moving middle background (pygame Surface)
-    sky_m: moving top background (pygame Surface)
-
-    return: None
-    """
-
-    win.blit(bg_img, (0, 0))
-    # sky_m.draw(win)
-    # bleachers_m.draw(win)
-    # track_m.draw(win)
-
-    text_score = STAT_FONT.render("Score: " + str(score), 1, (255, 255, 255))
-    win.blit(text_score, (WIN_WIDTH - 10 - text_score.get_width(), 10))
-
-    text_gen = STAT_FONT.render("Gen: " + str(gen_score), 1, (255, 255, 255))
-    win.blit(text_gen, (10, 10))
-
-    text_alive = STAT_FONT.render("Alive: " + str(alive_score), 1, (255, 255, 255))
-    win.blit(text_alive, (10, 50))
-
-    for runner in runners:
-        runner.draw(win)
-    for hurdle in hurdles:
-        hurdle.draw(win)
-
-    pygame.display.update()
+        self.img = ASSETS["sky_m"]
+        self.width = self.img.get_width()
 
 
-def game(genomes, config):
+class HurdlerGame(Environment):
     """
-    Run AI controlled game.
+    Runners jumping the hurdles of a track, one row per runner.
 
-    return: None
+    pack: the runners (Pack)
+    hurdles: Hurdle objects (common.obstacles.ObstacleStream)
     """
 
-    global GEN_SCORE
-    GEN_SCORE += 1
-
-    nets = []
-    ge = []
-    runners = []
-
-    for _, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        runners.append(Runner(100, 420))
-        g.fitness = 0
-        ge.append(g)
-
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
-    clock = pygame.time.Clock()
-
-    # sky_m = Sky(0)
-    # bleachers_m = Bleachers(114)
-    # track_m = Track(WIN_HEIGHT - track_img.get_height())
-
-    hurdles = [Hurdle(1100, 540)]
-
-    game_loop = True
-    score = 0
-
-    while game_loop:
-        clock.tick(30)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_loop = False
-                pygame.quit()
-                quit()
+    def __init__(self, size):
+        super().__init__(size)
+        self.pack = None
+        self.hurdles = None
+        self.rng = None
+        self.runner_width = 0
+        self.win = None
+        self.parallax = None
+
+    def reset(self, seed):
+        self.rng = random.Random(seed)
+        self.pack = Pack(self.size, 100, GROUND_Y)
+        self.hurdles = ObstacleStream()
+        self.hurdles.spawn(Hurdle(1100, 540, self.rng))
+        # a runner is as wide as its widest frame
+        self.runner_width = max(shape.width for shape in self.pack.shapes)
+        self.score = 0
+        self.top_up()
+
+    def top_up(self):
+        """
+        Add a hurdle behind the last one, while there are fewer than five.
 
-        # sky_m.move()
-        # bleachers_m.move()
-        # track_m.move()
+        return: None
+        """
 
+        hurdles = self.hurdles
         if len(hurdles) < 5:
-            hurdles.append(
+            hurdles.spawn(
                 Hurdle(
                     hurdles[-1].x + hurdles[-1].width + hurdles[-1].offset_back,
                     540,
+                    self.rng,
                 )
             )
 
+    def observe(self, rows):
+        pack = self.pack
+        hurdles = self.hurdles
         hurdle_index = 0
-        if len(runners) > 0:
-            if len(hurdles) > 1 and runners[0].x > hurdles[0].x + hurdles[0].width:
-                hurdle_index = 1
-        else:
-            game_loop = False
-            break
-
-        for i, runner in enumerate(runners):
-            runner.move()
-            ge[i].fitness += 0.1
-
-            output = nets[i].activate(
-                (
-                    runner.x - hurdles[hurdle_index].x,
-                    hurdles[hurdle_index].width,
-                    hurdles[hurdle_index].height,
-                    runner.x - hurdles[hurdle_index + 1].x,
-                    hurdles[hurdle_index + 1].width,
-                    hurdles[hurdle_index + 1].height,
-                )
+        if len(hurdles) > 1 and pack.x > hurdles[0].x + hurdles[0].width:
+            hurdle_index = 1
+
+        near, far = hurdles[hurdle_index], hurdles[hurdle_index + 1]
+        # every runner sees the same hurdles from the same x
+        return (
+            pack.x - near.x,
+            near.width,
+            near.height,
+            pack.x - far.x,
+            far.width,
+            far.height,
+        )
+
+    def step(self, rows, actions):
+        timer = timing.TIMER
+        pack = self.pack
+        hurdles = self.hurdles
+        pack.move(rows)
+        # outputs after the jump types keep the runner on the ground
+        pack.start_jump(rows, actions.argmax(axis=1))
+        timer.lap("physics")
+
+        hurdles.reach_while(lambda hurdle: hurdle.x < pack.x + self.runner_width)
+        hurdles.clear_while(lambda hurdle: hurdle.x + hurdle.width <= pack.x)
+        dones = hurdles.collide(rows, lambda hurdle, rows: hurdle.collide(pack, rows))
+        rewards = np.where(dones, -1.0, 0.0)
+        timer.lap("collision")
+
+        if not dones.all():
+            passed = hurdles.pass_while(
+                lambda hurdle: hurdle.x + hurdle.width <= pack.x
             )
+            self.score += passed
+            rewards[~dones] += passed
 
-            if output[0] == max(output):
-                runner.high_jump()
-            elif output[1] == max(output):
-                runner.low_jump()
-            elif output[2] == max(output):
-                runner.long_jump()
-            elif output[3] == max(output):
-                runner.short_jump()
-            else:
-                pass
-
-        remove_hurdle = []
+        hurdles.despawn_while(lambda hurdle: hurdle.x + hurdle.width < 0)
         for hurdle in hurdles:
-            for i, runner in enumerate(runners):
-                if hurdle.collision(runner):
-                    ge[i].fitness -= 1
-                    runners.pop(i)
-                    nets.pop(i)
-                    ge.pop(i)
-
-                if not hurdle.passed and hurdle.x + hurdle.width <= runner.x:
-                    hurdle.passed = True
-                    score += 1
-                    ge[i].fitness += 1
-
-            if hurdle.x + hurdle.width < 0:
-                remove_hurdle.append(hurdle)
-
             hurdle.move()
+        # the next frame starts with the new hurdle in sight
+        self.top_up()
+        timer.lap("obstacles")
+        return rewards, dones
+
+    def open(self):
+        self.win = Renderer(
+            pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)), ASSETS["bg"]
+        )
+        self.parallax = Parallax(
+            ASSETS["bg"],
+            [Sky(0), Bleachers(114), Track(WIN_HEIGHT - ASSETS.size("track_m")[1])],
+        )
 
-        for passed in remove_hurdle:
-            hurdles.remove(passed)
-
-        alive_score = len(runners)
-
-        draw_window(win, runners, hurdles, score, GEN_SCORE, alive_score)
+    def render(self, rows, gen, alive):
+        win = self.win
+        self.parallax.move()
+        self.parallax.draw(win)
+        draw_hud(win, HUD_TEXT, WIN_WIDTH, self.score, gen, alive)
+        self.pack.draw(win, rows)
+        for hurdle in self.hurdles:
+            hurdle.draw(win)
+        win.update()
+
+
+DRIVER = Driver(HurdlerGame, "hurdler", 25)
+play = DRIVER.play
+game = DRIVER.evaluate
+eval_genome = DRIVER.eval_genome
+
+
+def run(
+    config_path,
+    headless=False,
+    workers=1,
+    seed=None,
+    fixed_course=False,
+    cache_path=None,
+    resume=None,
+    profile=None,
+):
+    """
+    Run simulation and train new network, saved to winner.net.
 
+    See common.driver.Driver.run for the arguments.
 
-def run(config_path):
-    """Run simulation and train new network."""
+    return: best genome (neat.DefaultGenome)
+    """
 
-    config = neat.config.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
+    DRIVER.headless = headless
+    return DRIVER.run(
         config_path,
+        workers,
+        seed,
+        fixed_course,
+        cache_path,
+        resume,
+        profile,
+        "winner.net",
     )
 
-    p = neat.Population(config)
 
-    p.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
-    p.add_reporter(stats)
+def replay_genome(config_path, genome_path="winner.net", headless=False, seed=None):
+    """
+    Run simulation with trained networks.
 
-    winner = p.run(game, 25)
+    genome_path: network file of one or more networks (str)
+    headless: skip window, rendering and frame-rate cap (bool)
+    seed: course seed, the same seed replays the same run (int)
+    """
 
-    with open("winner.pickle", "wb") as f:
-        pickle.dump(winner, f)
+    DRIVER.headless = headless
+    DRIVER.replay(config_path, genome_path, seed)
 
 
-def replay_genome(config_path, genome_path="winner.pickle"):
-    """Run simulation with trained network."""
+def check_outputs(config):
+    """
+    Make sure the networks can pick every jump and still keep running.
 
-    config = neat.config.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
-        config_path,
-    )
+    config: NEAT configuration (neat.Config)
 
-    with open(genome_path, "rb") as f:
-        genome = pickle.load(f)
+    return: None
+    """
 
-    genomes = [(1, genome)]
-    game(genomes, config)
+    # outputs len(JUMPS) and up keep the runner on the ground
+    needed = len(JUMPS) + 1
+    if config.genome_config.num_outputs < needed:
+        raise ValueError(
+            "{0} jumps need num_outputs >= {1}, not {2}".format(
+                len(JUMPS), needed, config.genome_config.num_outputs
+            )
+        )
 
 
-def run_mode():
+def run_mode(
+    workers=1,
+    seed=None,
+    fixed_course=False,
+    cache_path=None,
+    resume=None,
+    profile=None,
+):
     """Chose how to run the simulation."""
 
     mode = input("[1] Train new network\n[2] Run saved network\n")
     if mode == "1":
-        run(config_path)
+        DRIVER.run(
+            config_path,
+            workers,
+            seed,
+            fixed_course,
+            cache_path,
+            resume,
+            profile,
+            "winner.net",
+        )
     elif mode == "2":
-        replay_genome(config_path)
+        DRIVER.replay(config_path, "winner.net", seed)
     else:
-        return run_mode()
+        return run_mode(workers, seed, fixed_course, cache_path, resume, profile)
     return None
 
 
 if __name__ == "__main__":
+    args = argument_parser().parse_args()
+    DRIVER.configure(args)
+
+    local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config-hurdler.txt")
-    run_mode()
+    check_outputs(load_config(config_path))
+    run_mode(
+        args.workers,
+        args.seed,
+        args.fixed_course,
+        args.fitness_cache,
+        args.resume,
+        profile_reporter(args, "hurdler-profile-"),
+    )
@@ -0,0 +1,122 @@
+"""
+Jump trajectories of the hurdler runner, baked into per-tick tables.
+
+A jump follows y = y0 - (a t^2 + b t + c) until the runner is back on the
+ground. jump_config.json lists the jump types in the order of the network
+outputs that choose them, with their coefficients and the animation frame
+shown in the air. load_jumps evaluates each parabola once, rounds it to
+whole pixels the way collision does and stores one entry per tick, so a
+runner in the air only counts ticks and looks its height up. Entries that
+parabola.py wrote with their table for the same ground use it as it is.
+jump_tables stacks the tables of all jump types for array-backed runners.
+"""
+
+import json
+
+import numpy as np
+
+# y of the runner on the ground
+GROUND_Y = 420
+# a parabola that has not landed after this many ticks never will
+MAX_AIRTIME = 10000
+
+
+class JumpProfile:
+    """
+    Trajectory of one jump type.
+
+    name: key in jump_config.json (str)
+    frame: animation frame while in the air (int)
+    a, b, c: coefficients of the parabola (float)
+    ground: y of the runner on the ground, the tables are baked for it (int)
+    airtime: tick the runner lands on, the last entry of dy (int)
+    dy: height above ground in whole pixels per tick, negative is up, dy[0] is
+        0 (numpy int array)
+    """
+
+    def __init__(self, name, a, b, c, frame, ground=GROUND_Y, dy=None):
+        self.name = name
+        self.a = a
+        self.b = b
+        self.c = c
+        self.frame = frame
+        self.ground = ground
+        self.dy = np.array(self.bake() if dy is None else dy, dtype=int)
+        self.airtime = len(self.dy) - 1
+
+    def bake(self):
+        """
+        Evaluate the parabola tick by tick until the runner lands.
+
+        return: dy table (list)
+        """
+
+        a, b, c, ground = self.a, self.b, self.c, self.ground
+        dy = [0]
+        t = 0
+        y = ground
+        while t == 0 or y < ground:
+            t += 1
+            if t > MAX_AIRTIME:
+                raise ValueError("Jump {0} never lands".format(self.name))
+            displacement = -a * t ** 2 - b * t - c
+            y = displacement + ground
+            dy.append(round(y) - ground)
+        return dy
+
+    def to_json(self):
+        """Entry of jump_config.json, with the table (dict)."""
+
+        return {
+            "a": self.a,
+            "b": self.b,
+            "c": self.c,
+            "frame": self.frame,
+            "ground": self.ground,
+            "dy": self.dy.tolist(),
+        }
+
+
+def load_jumps(path, ground=GROUND_Y):
+    """
+    Load the jump types of a jump config file, baking missing tables.
+
+    path: jump_config.json (str)
+    ground: y of the runner on the ground (int)
+
+    return: jump types in the order of the network outputs (list of JumpProfile)
+    """
+
+    with open(path) as f:
+        config = json.load(f)
+
+    jumps = []
+    for name, jump in config.items():
+        dy = jump.get("dy") if jump.get("ground") == ground else None
+        jumps.append(
+            JumpProfile(
+                name, jump["a"], jump["b"], jump["c"], jump["frame"], ground, dy
+            )
+        )
+    return jumps
+
+
+def jump_tables(jumps):
+    """
+    Stack the jump types into arrays indexed by jump type, then tick.
+
+    The row after the last jump type is running on the ground: no airtime
+    and no height.
+
+    jumps: (list of JumpProfile)
+
+    return: airtime and frame per jump type (numpy int arrays) and dy, zero
+        after landing (numpy int array, jump types + 1 by longest airtime + 1)
+    """
+
+    airtime = np.array([jump.airtime for jump in jumps] + [0])
+    frame = np.array([jump.frame for jump in jumps] + [0])
+    dy = np.zeros((len(jumps) + 1, airtime.max() + 1), dtype=int)
+    for i, jump in enumerate(jumps):
+        dy[i, : len(jump.dy)] = jump.dy
+    return airtime, frame, dy
@@ -1,51 +1,77 @@
-"""Calculates the coefficients a, b, c of the quadratic equation y = ax^2 + bx + c."""
+"""
+Calculates the coefficients a, b, c of the quadratic equation y = ax^2 + bx + c.
+
+A jump that takes off at tick 0, peaks at MAX_HEIGHT and lands at tick
+AIRTIME has the closed form
+
+    a = -4 * MAX_HEIGHT / AIRTIME^2,  b = 4 * MAX_HEIGHT / AIRTIME,  c = 0
+
+so a whole grid of targets is solved at once. Every result is checked for
+its roots and peak, baked into its per-tick table and written as a jump
+set, by default to jump_config_new.json so the tuned jump_config.json of
+the hurdler is kept. Copy it over jump_config.json to train with it: the
+network then needs one output per jump and one more to keep running.
+
+    python parabola.py --airtime 17 30 47 67 --max-height 50 100 250
+"""
+
+import argparse
+import json
+import os
 
 import numpy as np
-from scipy.optimize import fsolve
-import matplotlib.pyplot as plt
 
+from jumps import JumpProfile
 
-AIRTIME = 70
-MAX_HEIGHT = 50
 
+def parabola_coeff(airtime, max_height):
+    """
+    Fit the jumps for a batch of targets.
 
-def parabola_coeff(eq):
+    airtime: ticks from take-off to landing (float array-like)
+    max_height: height of the peak in pixels (float array-like)
 
-    a = eq[0]
-    b = eq[1]
-    c = eq[2]
+    return: a, b, c (numpy float arrays)
+    """
 
-    F = np.empty(3)
-    try:
-        F[0] = -b / (2 * a) - (AIRTIME / 2)
-        F[1] = -(((b ** 2) - (4 * a * c)) / (4 * a)) - MAX_HEIGHT
-        F[2] = -b - (((b * b) - (4 * a * c)) ** 0.5) / (2 * a)
-        # F[2] = -b + (((b * b) - (4 * a * c)) ** 0.5) / (2 * a)
-    except ValueError:
-        print("pass")
-        pass
+    airtime = np.asarray(airtime, dtype=float)
+    max_height = np.asarray(max_height, dtype=float)
 
-    return F
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = -4 * max_height / airtime ** 2
+        b = 4 * max_height / airtime
+    c = np.zeros_like(a)
+    return a, b, c
 
 
-if __name__ == "__main__":
-    eq_guess = np.array([-0.46, 21.5, 0.1])
+def check_roots(a, b, c, airtime, max_height, rtol=1e-9):
+    """
+    Check that each parabola starts at 0, lands at airtime and peaks at max_height.
 
-    eq = fsolve(parabola_coeff, eq_guess)
-    a = eq[0]
-    b = eq[1]
-    c = eq[2]
-    print(eq)
-    print(np.isclose(parabola_coeff(eq), [0.0, 0.0, 0.0]))
+    return: (numpy bool array)
+    """
 
-    x = np.linspace(-2, AIRTIME + 2, 100)
-    y = a * x ** 2 + b * x + c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = b ** 2 - 4 * a * c
+        sqrt_delta = np.sqrt(delta)
+        x_01 = (-b - sqrt_delta) / (2 * a)
+        x_02 = (-b + sqrt_delta) / (2 * a)
+        peak = -delta / (4 * a)
 
-    delta = b ** 2 - 4 * a * c
-    sqrt_delta = delta ** 0.5
-    x_01 = (round((-b - sqrt_delta) / (2 * a), 2), 0.00)
-    x_02 = (round((-b + sqrt_delta) / (2 * a), 2), 0.00)
-    peak = (round(-b / (2 * a), 2), round(-delta / (4 * a), 2))
+    scale = np.maximum(np.abs(airtime), 1.0)
+    return (
+        (a < 0)
+        & (delta > 0)
+        & np.isclose(np.minimum(x_01, x_02), 0.0, rtol=0.0, atol=rtol * scale)
+        & np.isclose(np.maximum(x_01, x_02), airtime, rtol=rtol)
+        & np.isclose(peak, max_height, rtol=rtol)
+    )
+
+
+def plot(jumps):
+    """Show the trajectories of the jumps, as the runner sees them."""
+
+    import matplotlib.pyplot as plt
 
     fig = plt.figure()
     ax = fig.add_subplot(1, 1, 1)
@@ -56,12 +82,83 @@ if __name__ == "__main__":
     ax.xaxis.set_ticks_position("bottom")
     ax.yaxis.set_ticks_position("left")
 
-    plt.plot(x, y, "r")
-    plt.plot(x_01[0], x_01[1], "ob")
-    plt.text(x_01[0], x_01[1] + 2, x_01, fontsize=12)
-    plt.plot(x_02[0], x_02[1], "ob")
-    plt.text(x_02[0], x_02[1] + 2, x_02, fontsize=12)
-    plt.plot(peak[0], peak[1], "ob")
-    plt.text(peak[0], peak[1] + 2, peak, fontsize=12)
-
+    for jump in jumps:
+        plt.plot(-jump.dy, label=jump.name)
+    plt.legend()
     plt.show()
+
+
+def main(args):
+    airtime, max_height = np.meshgrid(args.airtime, args.max_height, indexing="ij")
+    airtime = airtime.ravel()
+    max_height = max_height.ravel()
+
+    a, b, c = parabola_coeff(airtime, max_height)
+    valid = check_roots(a, b, c, airtime, max_height)
+
+    jumps = []
+    for i in range(len(airtime)):
+        name = "jump_{0:g}_{1:g}".format(airtime[i], max_height[i])
+        if not valid[i]:
+            print("{0}: no parabola for these targets, skipped".format(name))
+            continue
+
+        jump = JumpProfile(name, float(a[i]), float(b[i]), float(c[i]), args.frame)
+        if jump.dy.min() == 0:
+            print("{0}: lower than a pixel, skipped".format(name))
+            continue
+
+        jumps.append(jump)
+        print(
+            "{0}: a={1:.8f} b={2:.8f} c={3:.8f}, lands on tick {4}, "
+            "peaks at {5} px".format(
+                name, jump.a, jump.b, jump.c, jump.airtime, -jump.dy.min()
+            )
+        )
+
+    if not jumps:
+        raise SystemExit("No valid jumps, {0} left unchanged".format(args.output))
+
+    with open(args.output, "w") as f:
+        json.dump({jump.name: jump.to_json() for jump in jumps}, f, indent=4)
+    print(
+        "Wrote {0} jumps to {1}, the network needs num_outputs >= {2}".format(
+            len(jumps), args.output, len(jumps) + 1
+        )
+    )
+
+    if args.plot:
+        plot(jumps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--airtime",
+        type=float,
+        nargs="+",
+        required=True,
+        help="ticks from take-off to landing",
+    )
+    parser.add_argument(
+        "--max-height",
+        type=float,
+        nargs="+",
+        required=True,
+        help="peak heights in pixels, every one is combined with every airtime",
+    )
+    parser.add_argument(
+        "--frame",
+        type=int,
+        default=8,
+        help="animation frame shown in the air",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(os.path.dirname(__file__), "jump_config_new.json"),
+        help="jump config to write, jump_config.json is the one the hurdler reads",
+    )
+    parser.add_argument(
+        "--plot", action="store_true", help="show the trajectories (matplotlib)"
+    )
+    main(parser.parse_args())
@@ -1,81 +1,103 @@
 """
 Neural Network learns to drive micro car.
 """
+
 import math
 import os
 import random
-import time
+import sys
 
-import neat
+import numpy as np
 import pygame
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common import collision, timing  # noqa: E402
+from common.assets import Assets  # noqa: E402
+from common.atlas import RotationAtlas  # noqa: E402
+from common.driver import Driver, argument_parser, profile_reporter  # noqa: E402
+from common.environment import Environment  # noqa: E402
+from common.obstacles import ObstacleStream  # noqa: E402
+from common.render import Renderer, TextCache, draw_hud  # noqa: E402
+
 WIN_WIDTH = 600
 WIN_HEIGHT = 800
-gen_score = 0
-pygame.font.init()
-STAT_FONT = pygame.font.SysFont("comicsans", 50)
 
-curr_folder = os.path.dirname(__file__)
-car_img = pygame.image.load(os.path.join(curr_folder, "images", "car.png"))
-road_img = pygame.image.load(os.path.join(curr_folder, "images", "road.png"))
-cone_img = pygame.image.load(os.path.join(curr_folder, "images", "cone.png"))
-block_img = pygame.image.load(os.path.join(curr_folder, "images", "roadblock2.png"))
+# size and opaque box (x, y, w, h) of every sprite, from ASSETS.table()
+SPRITES = {
+    "car": (30, 60, (0, 0, 30, 60)),
+    "road": (600, 800, (0, 0, 600, 800)),
+    "cone": (20, 20, (1, 0, 18, 20)),
+    "roadblock": (500, 70, (0, 0, 500, 70)),
+}
+
+ASSETS = Assets(os.path.join(os.path.dirname(__file__), "images"), SPRITES)
+ASSETS.add("car", "car.png")
+ASSETS.add("road", "road.png")
+ASSETS.add("cone", "cone.png")
+ASSETS.add("roadblock", "roadblock2.png")
+
+HUD_TEXT = TextCache(lambda: ASSETS.font("comicsans", 50))
+
+
+class Fleet:
+    """All cars of a generation, one array row per car."""
+
+    WIDTH, HEIGHT = SPRITES["car"][:2]
+    MAX_ROTATION = 60
+    ROT_VEL = 10
+    V_Y = -10
+    MAX_V_X = 10
+    ATLAS = RotationAtlas(
+        lambda: [ASSETS["car"]], range(-MAX_ROTATION, MAX_ROTATION + 1, ROT_VEL)
+    )
+    # tan of every rotation step, from -MAX_ROTATION up
+    TAN = np.array(
+        [
+            math.tan(math.radians(rot))
+            for rot in range(-MAX_ROTATION, MAX_ROTATION + 1, ROT_VEL)
+        ]
+    )
 
+    def __init__(self, size, x, y):
+        self.shape = ASSETS.shape("car")
+        self.x = np.full(size, x, dtype=float)
+        self.y = y
+        self.v_x = np.zeros(size)
+        self.rot = np.zeros(size, dtype=int)
 
-class Car:
-    # img = car_img
-    max_rotation = 60
-    rot_vel = 10
+    def steer(self, rows, output):
+        """Turn left for a positive output, right otherwise."""
 
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.v_x = 0
-        self.v_y = -10
-        self.rot = 0
-        self.img = car_img
-
-    def rotation(self, turn):
-        if turn == "left":
-            self.rot += self.rot_vel
-        if turn == "right":
-            self.rot -= self.rot_vel
-
-        if self.rot <= -self.max_rotation:
-            self.rot = -self.max_rotation
-        if self.rot >= self.max_rotation:
-            self.rot = self.max_rotation
-
-        if self.rot <= 0.5 and self.rot >= -0.5:
-            self.v_x = 0
-        else:
-            self.v_x = self.v_y * math.tan(math.radians(self.rot))
+        rot = self.rot[rows]
+        rot[output > 0] += self.ROT_VEL
+        rot[output <= 0] -= self.ROT_VEL
+        rot = np.clip(rot, -self.MAX_ROTATION, self.MAX_ROTATION)
 
-    def move(self):
+        self.rot[rows] = rot
+        self.v_x[rows] = self.V_Y * self.TAN[(rot + self.MAX_ROTATION) // self.ROT_VEL]
 
-        if self.v_x >= 10:
-            self.v_x = 10
-        if self.v_x <= -10:
-            self.v_x = -10
+    def move(self, rows):
+        v_x = np.clip(self.v_x[rows], -self.MAX_V_X, self.MAX_V_X)
+        self.v_x[rows] = v_x
+        self.x[rows] += v_x
 
-        self.x += self.v_x
+    def inputs(self, rows, block):
+        x = self.x[rows]
+        return np.column_stack((x, np.abs(x - block.left), np.abs(x - block.right)))
 
-    def draw(self, win):
-        rotated_image = pygame.transform.rotate(self.img, self.rot)
-        new_rect = rotated_image.get_rect(
-            center=self.img.get_rect(topleft=(self.x, self.y)).center
-        )
-        win.blit(rotated_image, new_rect.topleft)
+    def off_road(self, rows):
+        x = self.x[rows]
+        return (x + self.WIDTH >= 540) | (x < 60)
 
-    def get_mask(self):
-        return pygame.mask.from_surface(self.img)
+    def draw(self, win, rows):
+        for rot, x in zip(self.rot[rows].tolist(), self.x[rows].tolist()):
+            self.ATLAS.blit(win, 0, rot, (x, self.y))
 
 
 class Road:
     def __init__(self, x=0):
         self.v = 10
-        self.img = road_img
-        self.height = self.img.get_height()
+        self.height = SPRITES["road"][1]
         self.x = x
         self.y1 = 0
         self.y2 = self.height
@@ -91,203 +113,158 @@ class Road:
             self.y2 = self.y1 - self.height
 
     def draw(self, win):
-        win.blit(self.img, (self.x, self.y1))
-        win.blit(self.img, (self.x, self.y2))
+        win.blit(ASSETS["road"], (self.x, self.y1))
+        win.blit(ASSETS["road"], (self.x, self.y2))
 
 
 class Block:
-    def __init__(self, y):
+    block_width, block_height = SPRITES["roadblock"][:2]
+
+    def __init__(self, y, rng=random):
         self.gap = 200
         self.v = 10
-        self.img = block_img
+        self.shape = ASSETS.shape("roadblock")
         self.y = y
         self.width = 0
 
         self.left = 0
         self.right = 0
-        self.block_left = self.img
-        self.block_right = self.img
 
-        self.passed = False
-        self.set_width()
+        self.set_width(rng)
 
-    def set_width(self):
-        self.width = random.randrange(50, 350)
-        self.left = self.width - self.block_left.get_width()
+    def set_width(self, rng=random):
+        self.width = rng.randrange(50, 350)
+        self.left = self.width - self.block_width
         self.right = self.width + self.gap
 
     def move(self):
         self.y += self.v
 
     def draw(self, win):
-        win.blit(self.block_left, (self.left, self.y))
-        win.blit(self.block_right, (self.right, self.y))
-
-    def collide(self, car):
-        car_mask = car.get_mask()
-        left_mask = pygame.mask.from_surface(self.block_left)
-        right_mask = pygame.mask.from_surface(self.block_right)
-
-        left_offset = (self.left - round(car.x), self.y - car.y)
-        right_offset = (self.right - round(car.x), self.y - car.y)
-
-        l_point = car_mask.overlap(left_mask, left_offset)
-        r_point = car_mask.overlap(right_mask, right_offset)
-
-        if l_point or r_point:
-            return True
-
-        return False
-
-
-def draw_window(win, cars, road, blocks, score, gen_score, alive_score):
-    road.draw(win)
-    for car in cars:
-        car.draw(win)
-    for block in blocks:
-        block.draw(win)
-
-    text_score = STAT_FONT.render("Score: " + str(score), 1, (255, 255, 255))
-    win.blit(text_score, (WIN_WIDTH - 10 - text_score.get_width(), 10))
-
-    text_gen = STAT_FONT.render("Gen: " + str(gen_score), 1, (255, 255, 255))
-    win.blit(text_gen, (10, 10))
-
-    text_alive = STAT_FONT.render("Alive: " + str(alive_score), 1, (255, 255, 255))
-    win.blit(text_alive, (10, 50))
-
-    pygame.display.update()
-
-
-def main(genomes, config):
-    global gen_score
-    gen_score += 1
-    run = True
-    clock = pygame.time.Clock()
-
-    road = Road()
-    blocks = [Block(-500)]
-
-    cars = []
-    nets = []
-    ge = []
-
-    for _, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        cars.append(Car(300, 700))
-        g.fitness = 0
-        ge.append(g)
-
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
-
-    score = 0
-    while run:
-        clock.tick(30)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-
-            """if event.type == pygame.KEYDOWN and event.key == pygame.K_a:
-                turn = "left"
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_d:
-                turn = "right"
-            else:
-                continue"""
-
-        block_ind = 0
-        if len(cars) > 0:
-            if (
-                len(cars) > 1
-                and cars[0].y > cars[0].y + blocks[0].block_left.get_height()
-            ):
-                block_ind = 1
-        else:
-            run = False
-            break
-
-        for n, car in enumerate(cars):
-
-            ge[n].fitness += 0.1
-            output = nets[n].activate(
-                (
-                    car.x,
-                    abs(car.x - blocks[block_ind].left),
-                    abs(car.x - blocks[block_ind].right),
-                )
-            )
-
-            if output[0] > 0:
-                turn = "left"
-            elif output[0] <= 0:
-                turn = "right"
-            else:
-                turn = None
-
-            car.rotation(turn)
-            car.move()
-
-        add_block = False
-        rem = []
-        for block in blocks:
-            for n, car in enumerate(cars):
-                if block.collide(car):
-                    ge[n].fitness -= 1
-                    cars.pop(n)
-                    nets.pop(n)
-                    ge.pop(n)
+        win.blit(ASSETS["roadblock"], (self.left, self.y))
+        win.blit(ASSETS["roadblock"], (self.right, self.y))
 
-                if not block.passed and block.y > car.y:
-                    block.passed = True
-                    add_block = True
+    def collide(self, fleet, rows):
+        hit = np.zeros(len(rows), dtype=bool)
+        lowest, hits = collision.horizontal_hits(
+            fleet.shape, self.shape, self.y - fleet.y
+        )
+        x = np.round(fleet.x[rows]).astype(int)
+
+        for block_x in (self.left, self.right):
+            i = block_x - x - lowest
+            inside = (i >= 0) & (i < len(hits))
+            hit |= inside & hits[np.clip(i, 0, len(hits) - 1)]
+
+        return hit
+
+
+class MicrocarGame(Environment):
+    """Cars dodging road blocks, one row per car."""
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.fleet = None
+        self.road = None
+        self.blocks = None
+        self.rng = None
+        self.win = None
+
+    def reset(self, seed):
+        self.rng = random.Random(seed)
+        self.road = Road()
+        self.blocks = ObstacleStream()
+        self.blocks.spawn(Block(-500, self.rng))
+        self.fleet = Fleet(self.size, 300, 700)
+        self.score = 0
+
+    def observe(self, rows):
+        return self.fleet.inputs(rows, self.blocks[0])
+
+    def step(self, rows, actions):
+        timer = timing.TIMER
+        fleet = self.fleet
+        blocks = self.blocks
+        fleet.steer(rows, actions[:, 0])
+        fleet.move(rows)
+        timer.lap("physics")
+
+        add_block = blocks.pass_while(lambda block: block.y > fleet.y)
+        blocks.reach_while(lambda block: block.y + block.block_height > fleet.y)
+        blocks.clear_while(lambda block: block.y >= fleet.y + fleet.HEIGHT)
+        dones = blocks.collide(rows, lambda block, rows: block.collide(fleet, rows))
+        rewards = np.where(dones, -1.0, 0.0)
+        timer.lap("collision")
 
+        for block in blocks:
             block.move()
-
-            if block.y + block.block_left.get_height() > WIN_HEIGHT + 100:
-                rem.append(block)
+        blocks.despawn_while(
+            lambda block: block.y + block.block_height > WIN_HEIGHT + 100
+        )
 
         if add_block:
-            score += 1
-            for g in ge:
-                g.fitness += 5
-            blocks.append(Block(-100))
-
-        for r in rem:
-            blocks.remove(r)
-
-        for n, car in enumerate(cars):
-            if car.x + car.img.get_width() >= 540 or car.x < 60:
-                cars.pop(n)
-                nets.pop(n)
-                ge.pop(n)
-
-        road.move()
-        alive_score = len(cars)
-        draw_window(win, cars, road, blocks, score, gen_score, alive_score)
-
-
-def run(config_path):
-    config = neat.config.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
-        config_path,
+            self.score += 1
+            rewards[~dones] += 5
+            blocks.spawn(Block(-100, self.rng))
+        timer.lap("obstacles")
+
+        dones |= fleet.off_road(rows)
+        timer.lap("collision")
+
+        self.road.move()
+        timer.lap("physics")
+        return rewards, dones
+
+    def open(self):
+        # the scrolling road covers the whole window every frame
+        self.win = Renderer(pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)))
+
+    def render(self, rows, gen, alive):
+        win = self.win
+        self.road.draw(win)
+        self.fleet.draw(win, rows)
+        for block in self.blocks:
+            block.draw(win)
+        draw_hud(win, HUD_TEXT, WIN_WIDTH, self.score, gen, alive)
+        win.update()
+
+
+DRIVER = Driver(MicrocarGame, "microcars", 50)
+play = DRIVER.play
+main = DRIVER.evaluate
+eval_genome = DRIVER.eval_genome
+
+
+def run(
+    config_path,
+    headless_mode=False,
+    workers=1,
+    seed=None,
+    fixed_course=False,
+    cache_path=None,
+    resume=None,
+    profile=None,
+):
+    """Train new networks, see common.driver.Driver.run."""
+
+    DRIVER.headless = headless_mode
+    return DRIVER.run(
+        config_path, workers, seed, fixed_course, cache_path, resume, profile
     )
 
-    p = neat.Population(config)
-
-    p.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
-    p.add_reporter(stats)
-
-    winner = p.run(main, 50)
-
 
 if __name__ == "__main__":
+    args = argument_parser().parse_args()
+    DRIVER.configure(args)
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config-microcar.txt")
-    run(config_path)
+    DRIVER.run(
+        config_path,
+        args.workers,
+        args.seed,
+        args.fixed_course,
+        args.fitness_cache,
+        args.resume,
+        profile_reporter(args, "microcar-profile-"),
+    )